@@ -19,6 +19,7 @@ from fastapi_health import health
 from app.resources.health_check import redis_check
 
 from .routers import api_root
+from .routers.v1 import api_cache
 from .routers.v1 import api_dataset
 from .routers.v1 import api_file
 from .routers.v1 import api_hpc
@@ -41,3 +42,4 @@ def api_registry(app: FastAPI):
     app.include_router(api_dataset.router, prefix=prefix)
     app.include_router(api_hpc.router, prefix=prefix)
     app.include_router(api_kg.router, prefix=prefix)
+    app.include_router(api_cache.router, prefix=prefix)
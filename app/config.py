@@ -74,6 +74,64 @@ class Settings(BaseSettings):
     REDIS_PASSWORD: str
     REDIS_DB: str
     REDIS_PORT: str
+    HTTPX_MAX_CONNECTIONS: int = 100
+    HTTPX_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTPX_KEEPALIVE_EXPIRY: float = 30.0
+    # per service override of max connections, e.g. {"METADATA_SERVICE": 200}
+    HTTPX_POOL_LIMITS: Dict[str, int] = {}
+    JWT_VERIFY_SIGNATURE: bool = False
+    JWT_JWKS_URL: str = ''
+    JWT_JWKS_REFRESH_INTERVAL: int = 3600
+    AUTH_USER_CACHE_TTL: int = 60
+    PERMISSION_CACHE_TTL: int = 300
+    # how often each worker picks up cache invalidations of other workers
+    CACHE_INVALIDATION_CHECK_INTERVAL: int = 5
+    PERMISSION_CACHE_REDIS: bool = False
+    POLICY_ENGINE_ENABLED: bool = False
+    POLICY_ENGINE_MATRIX_ENDPOINT: str = '/v1/authorize/matrix'
+    POLICY_ENGINE_REFRESH_INTERVAL: int = 300
+    PERMISSION_CHECK_CONCURRENCY: int = 10
+    GEID_BATCH_CHUNK_SIZE: int = 200
+    GEID_BATCH_CONCURRENCY: int = 5
+    QUERY_GEID_MAX: int = 50000
+    PREUPLOAD_CHECK_CONCURRENCY: int = 10
+    # metadata service accepts several name values in one items search
+    METADATA_MULTI_NAME_QUERY: bool = False
+    # split preuploads bigger than this many files, 0 disables sharding
+    PREUPLOAD_SHARD_SIZE: int = 0
+    PREUPLOAD_SHARD_CONCURRENCY: int = 4
+    TEMPLATE_CACHE_TTL: int = 300
+    TEMPLATE_CACHE_STALE_TTL: int = 3600
+    TEMPLATE_CACHE_MAXSIZE: int = 1024
+    VALIDATION_PLAN_CACHE_TTL: int = 3600
+    VALIDATE_MANIFESTS_MAX: int = 10000
+    MANIFEST_ATTACH_MAX: int = 10000
+    MANIFEST_ATTACH_CONCURRENCY: int = 10
+    DECRYPTION_CACHE_SIZE: int = 1024
+    DECRYPTION_CACHE_TTL: int = 3600
+    DATASET_CACHE_TTL: int = 30
+    DATASET_VERSION_CACHE_TTL: int = 86400
+    DATASET_VERSION_CACHE_SIZE: int = 1024
+    LISTING_PAGE_SIZE: int = 100
+    LISTING_PREFETCH_PAGES: int = 3
+    PROJECT_LIST_CACHE_TTL: int = 60
+    HPC_TOKEN_CACHE_ENABLED: bool = True
+    HPC_TOKEN_CACHE_TTL: int = 3600
+    # stop reusing a token this many seconds before it expires
+    HPC_TOKEN_EXPIRY_MARGIN: int = 60
+    HPC_SNAPSHOT_REFRESH_INTERVAL: int = 30
+    # snapshots older than this are reloaded on request, e.g. after refresh errors
+    HPC_SNAPSHOT_MAX_AGE: int = 90
+    HPC_SNAPSHOT_IDLE_TIMEOUT: int = 300
+    HPC_JOB_WATCH_INTERVAL: int = 5
+    HPC_JOB_WATCH_KEEPALIVE: int = 15
+    HPC_JOB_WATCH_MAX_FAILURES: int = 5
+    HPC_JOB_STATUS_CONCURRENCY: int = 10
+    HPC_JOB_STATUS_MAX: int = 1000
+    HPC_SUBMIT_CONCURRENCY_PER_HOST: int = 4
+    HPC_JOB_SUBMIT_MAX: int = 100
+    KG_IMPORT_CHUNK_SIZE: int = 100
+    KG_IMPORT_CONCURRENCY: int = 4
 
     def modify_values(self, settings):
         settings.REDIS_URI = f'redis://:{settings.REDIS_PASSWORD}@{settings.REDIS_HOST}:{settings.REDIS_PORT}'
@@ -27,8 +27,16 @@ from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 
 from app.config import ConfigClass
+from app.models.base_models import ORJSONResponse
 from app.namespace import namespace
 from app.resources.error_handler import APIException
+from app.resources.hpc_cluster_cache import hpc_cluster_cache
+from app.resources.hpc_job_watch import hpc_job_watch
+from app.resources.http_clients import service_clients
+from app.resources.policy_engine import policy_engine
+from app.resources.project_client import get_project_client
+from app.resources.redis_client import close_redis
+from app.resources.signing_keys import signing_keys
 
 from .api_registry import api_registry
 
@@ -57,7 +65,8 @@ def create_app():
         title='BFF CLI',
         description='BFF for cli',
         docs_url='/v1/api-doc',
-        version=ConfigClass.version
+        version=ConfigClass.version,
+        default_response_class=ORJSONResponse,
     )
 
     app.add_middleware(
@@ -68,6 +77,24 @@ def create_app():
         allow_headers=['*'],
     )
 
+    @app.on_event('startup')
+    async def startup():
+        service_clients.open()
+        get_project_client()
+        if ConfigClass.JWT_VERIFY_SIGNATURE:
+            signing_keys.start()
+        if ConfigClass.POLICY_ENGINE_ENABLED:
+            policy_engine.start()
+
+    @app.on_event('shutdown')
+    async def shutdown():
+        await signing_keys.stop()
+        await policy_engine.stop()
+        await hpc_cluster_cache.close()
+        hpc_job_watch.clear()
+        await service_clients.close()
+        await close_redis()
+
     @app.exception_handler(APIException)
     async def http_exception_handler(request: Request, exc: APIException):
         return JSONResponse(
@@ -14,10 +14,16 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from enum import Enum
+from typing import Any
 
+import orjson
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+SSE_MEDIA_TYPE = 'text/event-stream'
+
 
 class EAPIResponseCode(Enum):
     success = 200
@@ -27,6 +33,16 @@ class EAPIResponseCode(Enum):
     forbidden = 403
     unauthorized = 401
     conflict = 409
+    service_unavailable = 503
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse serialized with orjson, falling back to jsonable_encoder."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS
+        )
 
 
 class APIResponse(BaseModel):
@@ -35,6 +51,7 @@ class APIResponse(BaseModel):
     result = []
 
     def json_response(self):
-        data = self.dict()
+        # result is passed through as is, orjson handles nested models
+        data = dict(self.__dict__)
         data['code'] = self.code.value
-        return JSONResponse(status_code=self.code.value, content=data)
+        return ORJSONResponse(status_code=self.code.value, content=data)
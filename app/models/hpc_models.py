@@ -13,6 +13,8 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from typing import List
+
 from pydantic import BaseModel
 from pydantic import Field
 
@@ -59,6 +61,27 @@ class HPCJobResponse(APIResponse):
     )
 
 
+class HPCJobsSubmitPost(BaseModel):
+    """Submit many HPC jobs post model."""
+    host: str
+    username: str
+    token: str
+    jobs: List[dict]
+
+
+class HPCJobsSubmitResponse(APIResponse):
+    """HPC Jobs Submission Response Class."""
+    result: list = Field([], example={
+        'code': 200,
+        'error_msg': '',
+        'result': [
+            {'job_id': 15178},
+            {'code': 403, 'error_msg': 'HPC token expired'}
+        ]
+    }
+    )
+
+
 class HPCJobInfoGet(BaseModel):
     """Get HPC Job info model."""
     job_id: str
@@ -83,6 +106,36 @@ class HPCJobInfoResponse(APIResponse):
     )
 
 
+class HPCJobsStatusPost(BaseModel):
+    """Get many HPC jobs status post model."""
+    host: str
+    username: str
+    token: str
+    job_ids: List[str]
+
+
+class HPCJobsStatusResponse(APIResponse):
+    """HPC Jobs Status Response Class."""
+    result: dict = Field({}, example={
+        'code': 200,
+        'error_msg': '',
+        'result': {
+            '12345': {
+                'job_id': '12345',
+                'job_state': 'COMPLETED',
+                'standard_error': '',
+                'standard_input': '',
+                'standard_output': ''
+            },
+            '12346': {
+                'code': 404,
+                'error_msg': 'Job ID not found'
+            }
+        }
+    }
+    )
+
+
 class HPCNodesResponse(APIResponse):
     """HPC Nodes Response Class."""
     result: dict = Field({}, example={
@@ -13,6 +13,8 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from typing import List
+
 from pydantic import BaseModel
 from pydantic import Field
 
@@ -105,6 +107,43 @@ class ManifestAttachResponse(APIResponse):
     )
 
 
+class ManifestAttachItem(BaseModel):
+    """Attributes to attach to one file."""
+    file_name: str
+    attributes: dict
+
+
+class ManifestBatchAttachPost(BaseModel):
+    """Attach Manifest to many files post model."""
+    manifest_name: str
+    project_code: str
+    zone: str
+    items: List[ManifestAttachItem]
+
+
+class ManifestBatchAttachResponse(APIResponse):
+    """Attach Manifest to many files response class."""
+    result: list = Field([], example={
+        'code': 200,
+        'error_msg': '',
+        'result': [
+            {
+                'file_name': 'raw/testf1',
+                'code': 200,
+                'error_msg': '',
+                'result': {'id': 'file-geid', 'name': 'testf1', 'attribute_template_id': 'manifest-id'}
+            },
+            {
+                'file_name': 'raw/testf2',
+                'code': 404,
+                'error_msg': 'File Not Exist',
+                'result': None
+            }
+        ]
+    }
+    )
+
+
 class ManifestExportParam(BaseModel):
     project_code: str
     name: str
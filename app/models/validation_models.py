@@ -13,6 +13,8 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+from typing import List
+
 from pydantic import BaseModel
 from pydantic import Field
 
@@ -40,6 +42,38 @@ class ManifestValidateResponse(APIResponse):
     )
 
 
+class ManifestsValidatePost(BaseModel):
+    """Validate Manifests post model."""
+    manifests: List[dict] = Field([], example=[
+        {
+            'manifest_name': 'Manifest1',
+            'project_code': 'sampleproject',
+            'attributes': {'attr1': 'a1', 'attr2': 'test cli upload'},
+            'file_path': '/data/core-storage/sampleproject/raw/testf1'
+        }
+    ]
+    )
+
+
+class ManifestsValidateResponse(APIResponse):
+    """Validate Manifests Response class."""
+    result: list = Field([], example={
+        'code': 200,
+        'error_msg': '',
+        'result': [
+            {
+                'manifest_name': 'Manifest1',
+                'project_code': 'sampleproject',
+                'file_path': '/data/core-storage/sampleproject/raw/testf1',
+                'code': 200,
+                'error_msg': '',
+                'result': 'valid'
+            }
+        ]
+    }
+    )
+
+
 class EnvValidatePost(BaseModel):
     """Validate Environment post model."""
     action: str
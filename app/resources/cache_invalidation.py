@@ -0,0 +1,66 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+
+from common import LoggerFactory
+
+from .redis_client import get_redis
+from ..config import ConfigClass
+
+_logger = LoggerFactory('CacheInvalidation').get_logger()
+
+ALL_SCOPES = '*'
+
+
+class SharedInvalidations:
+    """Invalidation counters shared by all workers through a redis hash.
+
+    Every invalidation bumps the counter of its scope. Workers poll the hash
+    at most every CACHE_INVALIDATION_CHECK_INTERVAL seconds and drop what
+    other workers invalidated since their last poll.
+    """
+
+    def __init__(self, name):
+        self._key = f'bff_cli-{name}-invalidations'
+        self._seen = None
+        self._checked_at = None
+
+    async def publish(self, scope=ALL_SCOPES):
+        try:
+            await get_redis().hincrby(self._key, scope, 1)
+        except Exception as e:
+            _logger.error(f'Error publishing invalidation of {self._key}: {e}')
+
+    async def poll(self):
+        """Return the scopes invalidated since the last poll."""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < ConfigClass.CACHE_INVALIDATION_CHECK_INTERVAL:
+            return []
+        self._checked_at = now
+        try:
+            counters = await get_redis().hgetall(self._key)
+        except Exception as e:
+            _logger.error(f'Error polling invalidations of {self._key}: {e}')
+            return []
+        counters = {scope.decode(): int(count) for scope, count in counters.items()}
+        seen, self._seen = self._seen, counters
+        if seen is None:
+            return []
+        return [scope for scope, count in counters.items() if seen.get(scope) != count]
+
+    def clear(self):
+        self._seen = None
+        self._checked_at = None
@@ -0,0 +1,169 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import asyncio
+import time
+from collections import deque
+from typing import Any
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+
+from common import LoggerFactory
+
+_logger = LoggerFactory('concurrency').get_logger()
+
+
+async def gather_bounded(aws: Iterable[Awaitable], limit: int) -> List:
+    """Await all of aws with at most limit running at once, keeping order.
+
+    The first exception cancels whatever is still pending and is re-raised.
+    """
+    semaphore = asyncio.Semaphore(max(limit, 1))
+
+    async def run(aw):
+        async with semaphore:
+            return await aw
+
+    tasks = [asyncio.ensure_future(run(aw)) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def any_bounded(aws: Iterable[Awaitable], limit: int) -> bool:
+    """Return True as soon as one of aws returns a truthy value.
+
+    At most limit awaitables run at once and the rest are cancelled early.
+    """
+    semaphore = asyncio.Semaphore(max(limit, 1))
+
+    async def run(aw):
+        async with semaphore:
+            return await aw
+
+    tasks = [asyncio.ensure_future(run(aw)) for aw in aws]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            if await next_done:
+                return True
+        return False
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def iter_bounded(aws: Iterable[Awaitable], limit: int) -> AsyncIterator:
+    """Yield the results of aws as they complete, with at most limit running at once.
+
+    Leaving the iteration early cancels whatever is still pending.
+    """
+    semaphore = asyncio.Semaphore(max(limit, 1))
+
+    async def run(aw):
+        async with semaphore:
+            return await aw
+
+    tasks = [asyncio.ensure_future(run(aw)) for aw in aws]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def fan_out(
+    calls: Dict[str, Awaitable],
+    abort: Optional[Callable[[Dict[str, Any]], bool]] = None,
+    guard: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run independent calls concurrently and return their results by name.
+
+    The first exception cancels the pending calls and is re-raised. When
+    abort(results) is true for the results gathered so far the pending
+    calls are cancelled too and only those results are returned.
+
+    When guard names one of the calls, an exception from another call waits
+    for the guard result first and is only raised if abort(results) is then
+    still false, so e.g. a permission denial wins over a failed lookup.
+    """
+    timings = {}
+
+    async def run(name, aw):
+        start = time.perf_counter()
+        try:
+            return name, await aw
+        finally:
+            timings[name] = (time.perf_counter() - start) * 1000
+
+    tasks = {name: asyncio.ensure_future(run(name, aw)) for name, aw in calls.items()}
+    results = {}
+    try:
+        for next_done in asyncio.as_completed(tasks.values()):
+            try:
+                name, result = await next_done
+            except Exception:
+                if guard is None or guard in results or abort is None:
+                    raise
+                results[guard] = (await tasks[guard])[1]
+                if not abort(results):
+                    raise
+                break
+            results[name] = result
+            if abort is not None and abort(results):
+                break
+        return results
+    finally:
+        for task in tasks.values():
+            task.cancel()
+        _logger.info('fan_out timings: ' + ', '.join(f'{name}={ms:.1f}ms' for name, ms in timings.items()))
+
+
+async def iter_pages(
+    fetch_page: Callable[[int], Awaitable[Optional[List]]], page_size: int, prefetch: int
+) -> AsyncIterator[List]:
+    """Yield pages 0, 1, ... of a listing in order, fetching up to prefetch pages ahead.
+
+    The listing ends at the first page shorter than page_size. Pages
+    requested past the end are cancelled. A page fetched as None is a failed
+    fetch and raises LookupError rather than ending the listing.
+    """
+    window = deque()
+    next_page = 0
+    try:
+        while True:
+            while len(window) < max(prefetch, 1):
+                window.append((next_page, asyncio.ensure_future(fetch_page(next_page))))
+                next_page += 1
+            page, task = window.popleft()
+            items = await task
+            if items is None:
+                raise LookupError(f'Cannot fetch page {page}')
+            if items:
+                yield items
+            if len(items) < page_size:
+                return
+    finally:
+        for _, task in window:
+            task.cancel()
@@ -0,0 +1,64 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from .cache import TTLCache
+from ..config import ConfigClass
+
+
+class DatasetVersionCache:
+    """Published dataset versions keyed by (dataset_geid, version).
+
+    A version never changes once published, so records are only ever added.
+    The newest page is re-checked for additions at most once per
+    DATASET_CACHE_TTL, and every page can be served from memory once all
+    versions reported by the dataset service have been seen.
+    """
+
+    def __init__(self):
+        self._datasets = TTLCache(
+            maxsize=ConfigClass.DATASET_VERSION_CACHE_SIZE,
+            ttl=ConfigClass.DATASET_VERSION_CACHE_TTL,
+        )
+        self._checked = TTLCache(maxsize=ConfigClass.DATASET_VERSION_CACHE_SIZE)
+
+    def is_checked(self, dataset_geid):
+        return dataset_geid in self._checked
+
+    def add(self, dataset_geid, records, total=None, newest=False):
+        entry = self._datasets.get(dataset_geid) or {'versions': {}, 'total': None}
+        for record in records:
+            entry['versions'].setdefault(record['version'], record)
+        if total is not None:
+            entry['total'] = total
+        self._datasets.set(dataset_geid, entry)
+        if newest:
+            self._checked.set(dataset_geid, True, ConfigClass.DATASET_CACHE_TTL)
+
+    def page(self, dataset_geid, page, page_size):
+        """Return one page of versions, newest first, or None when not all are known."""
+        entry = self._datasets.get(dataset_geid)
+        if entry is None or entry['total'] is None or len(entry['versions']) < entry['total']:
+            return None
+        ordered = sorted(entry['versions'].values(), key=lambda record: record['created_at'], reverse=True)
+        return ordered[page * page_size:(page + 1) * page_size]
+
+    def clear(self):
+        self._datasets.clear()
+        self._checked.clear()
+
+
+dataset_version_cache = DatasetVersionCache()
+dataset_cache = TTLCache(maxsize=1024, ttl=ConfigClass.DATASET_CACHE_TTL)
+dataset_list_cache = TTLCache(maxsize=1024, ttl=ConfigClass.DATASET_CACHE_TTL)
@@ -24,12 +24,66 @@ from app.resources.error_handler import APIException
 from app.resources.error_handler import ECustomizedError
 from app.resources.error_handler import customized_error_template
 
+from .cache import TTLCache
+from .concurrency import gather_bounded
+from .http_clients import get_client
+from .permission_cache import permission_cache
+from .policy_engine import policy_engine
+from .signing_keys import verify_token
 from ..config import ConfigClass
 from ..models.base_models import APIResponse
 from ..models.base_models import EAPIResponseCode
 
 api_response = APIResponse()
 _logger = LoggerFactory('Dependencies').get_logger()
+user_cache = TTLCache(maxsize=10000, ttl=ConfigClass.AUTH_USER_CACHE_TTL)
+
+
+async def _get_user(username, exp):
+    """Return the auth service user, or the error response when it cannot be found.
+
+    Users are cached for AUTH_USER_CACHE_TTL but never longer than the token expiry.
+    """
+    # check if user is existed in keycloak
+    user = user_cache.get(username)
+    if user is not None:
+        return user, None
+    client = get_client('AUTH_SERVICE')
+    res = await client.get(
+        ConfigClass.AUTH_SERVICE + '/v1/admin/user', params={'username': username}
+    )
+    if res.status_code != 200:
+        api_response.code = EAPIResponseCode.forbidden
+        api_response.error_msg = 'Auth Service: ' + str(res.json())
+        return None, api_response.json_response()
+
+    user = res.json()['result']
+    if not user:
+        api_response.code = EAPIResponseCode.not_found
+        api_response.error_msg = f'Auth service: {username} does not exist.'
+        return None, api_response.json_response()
+    user_cache.set(
+        username, user, min(ConfigClass.AUTH_USER_CACHE_TTL, exp - time.time())
+    )
+    return user, None
+
+
+async def _verify_token(token):
+    """Return the verified token payload, or the error response when it is rejected."""
+    try:
+        return await verify_token(token), None
+    except pyjwt.ExpiredSignatureError:
+        api_response.code = EAPIResponseCode.unauthorized
+        api_response.error_msg = 'Token expired'
+    except pyjwt.InvalidTokenError as e:
+        _logger.info(f'Invalid token: {e}')
+        api_response.code = EAPIResponseCode.unauthorized
+        api_response.error_msg = 'Invalid token'
+    except httpx.HTTPError as e:
+        _logger.error(f'Error fetching signing keys: {e}')
+        api_response.code = EAPIResponseCode.service_unavailable
+        api_response.error_msg = 'Signing keys unavailable'
+    return None, api_response.json_response()
 
 
 async def jwt_required(request: Request):
@@ -41,7 +95,12 @@ async def jwt_required(request: Request):
             error_msg='Token required',
             status_code=EAPIResponseCode.unauthorized.value,
         )
-    payload = pyjwt.decode(token, verify=False)
+    if ConfigClass.JWT_VERIFY_SIGNATURE:
+        payload, error_response = await _verify_token(token)
+        if error_response is not None:
+            return error_response
+    else:
+        payload = pyjwt.decode(token, verify=False)
     username: str = payload.get('preferred_username')
     realm_roles = payload['realm_access']['roles']
     exp = payload.get('exp')
@@ -54,24 +113,9 @@ async def jwt_required(request: Request):
         api_response.error_msg = 'User not found'
         return api_response.json_response()
 
-    # check if user is existed in keycloak
-    async with httpx.AsyncClient() as client:
-        payload = {
-            'username': username,
-        }
-        res = await client.get(
-            ConfigClass.AUTH_SERVICE + '/v1/admin/user', params=payload
-        )
-    if res.status_code != 200:
-        api_response.code = EAPIResponseCode.forbidden
-        api_response.error_msg = 'Auth Service: ' + str(res.json())
-        return api_response.json_response()
-
-    user = res.json()['result']
-    if not user:
-        api_response.code = EAPIResponseCode.not_found
-        api_response.error_msg = f'Auth service: {username} does not exist.'
-        return api_response.json_response()
+    user, error_response = await _get_user(username, exp)
+    if error_response is not None:
+        return error_response
 
     user_id = user['id']
     role = user['role']
@@ -121,26 +165,32 @@ async def has_permission(identity, project_code, resource, zone, operation):
                     user might not belong to project'
             )
             return False
+    permission = policy_engine.check(role, resource, zone, operation)
+    if permission is not None:
+        return permission
     try:
+        cache_key = (role, resource, zone, operation)
+        permission = await permission_cache.get(cache_key)
+        if permission is not None:
+            return permission
         payload = {
             'role': role,
             'resource': resource,
             'zone': zone,
             'operation': operation,
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                ConfigClass.AUTH_SERVICE + '/v1/authorize', params=payload
-            )
+        client = get_client('AUTH_SERVICE')
+        response = await client.get(
+            ConfigClass.AUTH_SERVICE + '/v1/authorize', params=payload
+        )
         if response.status_code != 200:
             error_msg = f'Error calling authorize API - {response.json()}'
             raise APIException(
                 status_code=response.status_code, error_msg=error_msg
             )
-        if response.json()['result'].get('has_permission'):
-            return True
-        else:
-            return False
+        permission = bool(response.json()['result'].get('has_permission'))
+        await permission_cache.set(cache_key, permission)
+        return permission
     except Exception as e:
         error_msg = str(e)
         _logger.info(f'Exception on authorize call: {error_msg}')
@@ -149,11 +199,15 @@ async def has_permission(identity, project_code, resource, zone, operation):
         )
 
 
-def select_url_by_zone(zone):
+def select_service_by_zone(zone):
     if zone == ConfigClass.CORE_ZONE_LABEL.lower():
-        url = ConfigClass.UPLOAD_SERVICE_CORE + '/v1/files/jobs'
-    else:
-        url = ConfigClass.UPLOAD_SERVICE_GREENROOM + '/v1/files/jobs'
+        return 'UPLOAD_SERVICE_CORE'
+    return 'UPLOAD_SERVICE_GREENROOM'
+
+
+def select_url_by_zone(zone):
+    service = select_service_by_zone(zone)
+    url = getattr(ConfigClass, service) + '/v1/files/jobs'
     return url
 
 
@@ -193,6 +247,52 @@ def validate_upload_event(zone, current_identity, project_code):
     return result, error_msg
 
 
+def _shard_error_msg(response):
+    try:
+        return response.json().get('error_msg') or response.text
+    except ValueError:
+        return response.text
+
+
+async def transfer_shards_to_pre(client, url, headers, payload, shard_size):
+    """Post the preupload in shards and merge the results into one response."""
+    files = payload['data']
+    shards = [files[i:i + shard_size] for i in range(0, len(files), shard_size)]
+    _logger.info(f'Sending {len(files)} files to pre upload in {len(shards)} shards')
+    responses = await gather_bounded(
+        (client.post(url, headers=headers, json={**payload, 'data': shard}) for shard in shards),
+        ConfigClass.PREUPLOAD_SHARD_CONCURRENCY,
+    )
+    merged = []
+    failures = []
+    for index, response in enumerate(responses):
+        if response.status_code != 200:
+            start = index * shard_size
+            failures.append((
+                response.status_code,
+                f'shard {index + 1}/{len(shards)} (files {start}-{start + len(shards[index]) - 1}): '
+                f'{_shard_error_msg(response)}'
+            ))
+            continue
+        result = response.json().get('result')
+        if isinstance(result, list):
+            merged.extend(result)
+        elif result is not None:
+            merged.append(result)
+    if failures:
+        _logger.error(f'Pre upload shard failures: {failures}')
+        return httpx.Response(
+            failures[0][0],
+            json={
+                'code': failures[0][0],
+                'error_msg': f'{len(failures)} of {len(shards)} shards failed, '
+                + '; '.join(msg for _, msg in failures),
+                'result': merged,
+            },
+        )
+    return httpx.Response(200, json={'code': 200, 'error_msg': '', 'result': merged})
+
+
 async def transfer_to_pre(data, project_code, header):
     try:
         _logger.info('transfer_to_pre'.center(80, '-'))
@@ -209,9 +309,13 @@ async def transfer_to_pre(data, project_code, header):
             'authorization': header.get('authorization')
         }
         url = select_url_by_zone(data.zone)
-        async with httpx.AsyncClient() as client:
+        client = get_client(select_service_by_zone(data.zone))
+        shard_size = ConfigClass.PREUPLOAD_SHARD_SIZE
+        if 0 < shard_size < len(data.data):
+            result = await transfer_shards_to_pre(client, url, headers, payload, shard_size)
+        else:
             result = await client.post(url, headers=headers, json=payload)
-            _logger.info(f'pre response: {result.text}')
+        _logger.info(f'pre response: {result.text}')
         return result
     except Exception as e:
         api_response.error_msg = f'Upload service error: {e}'
@@ -13,10 +13,19 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import httpx
+import asyncio
+from collections import deque
+from itertools import islice
+
 from common import LoggerFactory
-from common.project.project_client import ProjectClient
 
+from .dataset_cache import dataset_cache
+from .dataset_cache import dataset_list_cache
+from .dataset_cache import dataset_version_cache
+from .http_clients import get_client
+from .project_client import get_project_client
+from .project_client import project_list_cache
+from .template_cache import template_cache
 from ..config import ConfigClass
 
 _logger = LoggerFactory('Helpers').get_logger()
@@ -29,46 +38,83 @@ def get_zone(namespace):
     }.get(namespace.lower(), 0)
 
 
+async def _query_node_chunk(geid_chunk):
+    client = get_client('METADATA_SERVICE')
+    response = await client.get(
+        ConfigClass.METADATA_SERVICE + '/v1/items/batch/',
+        params={'ids': geid_chunk},
+        follow_redirects=True,
+    )
+    _logger.info(f'query response: {response.status_code} for {len(geid_chunk)} geids')
+    response.raise_for_status()
+    result = response.json().get('result')
+    if result is None:
+        raise LookupError(f'Cannot query geids: {response.text}')
+    return result
+
+
+async def iter_query_node_by_geid(geid_list):
+    """Yield (geid_chunk, nodes by geid) per chunk, in the order of geid_list.
+
+    Up to GEID_BATCH_CONCURRENCY chunks are queried ahead of the consumer,
+    so at most that many chunks of nodes are held in memory at once.
+    """
+    unique_geids = list(dict.fromkeys(geid_list))
+    chunk_size = ConfigClass.GEID_BATCH_CHUNK_SIZE
+    chunks = iter([
+        unique_geids[i:i + chunk_size]
+        for i in range(0, len(unique_geids), chunk_size)
+    ])
+    _logger.info(f'Querying {len(unique_geids)} geids in chunks of {chunk_size}')
+    pending = deque()
+    for chunk in islice(chunks, max(ConfigClass.GEID_BATCH_CONCURRENCY, 1)):
+        pending.append((chunk, asyncio.ensure_future(_query_node_chunk(chunk))))
+    try:
+        while pending:
+            chunk, task = pending.popleft()
+            nodes = await task
+            next_chunk = next(chunks, None)
+            if next_chunk is not None:
+                pending.append((next_chunk, asyncio.ensure_future(_query_node_chunk(next_chunk))))
+            requested = set(chunk)
+            query_result = {}
+            for node in nodes:
+                geid = node.get('id', '')
+                # get file geid and archived status
+                if geid in requested and not node.get('archived'):
+                    query_result[geid] = node
+            yield chunk, query_result
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+
 async def batch_query_node_by_geid(geid_list):
     _logger.info('batch_query_node_by_geid'.center(80, '-'))
-    params = {'ids': geid_list}
-    _logger.info(f'params: {params}')
-    async with httpx.AsyncClient() as client:
-        response = await client.get(
-            ConfigClass.METADATA_SERVICE + '/v1/items/batch/',
-            params=params,
-            follow_redirects=True,
-        )
-    _logger.info(response.url)
-    _logger.info(f'query response: {response.text}')
-    res_json = response.json()
-    _logger.info(f'res_json: {res_json}')
-    result = res_json.get('result')
-    located_geid = []
     query_result = {}
-    for node in result:
-        geid = node.get('id', '')
-        archived = node.get('archived')
-        # get file geid and archived status
-        if geid in geid_list and not archived:
-            located_geid.append(geid)
-            query_result[geid] = node
+    async for _, chunk_result in iter_query_node_by_geid(geid_list):
+        query_result.update(chunk_result)
     # Returning valid geid list, incase archived or non-exist
-    _logger.info(f'returning located_geid: {located_geid}')
-    _logger.info(f'returning query_result: {query_result}')
+    located_geid = list(query_result)
+    _logger.info(f'returning {len(located_geid)} located geids')
     return located_geid, query_result
 
 
 async def get_dataset(dataset_code):
     """get dataset node information."""
     _logger.info('get_dataset'.center(80, '-'))
+    result = dataset_cache.get(dataset_code)
+    if result is not None:
+        return result
     try:
         url = ConfigClass.DATASET_SERVICE + f'/v1/dataset-peek/{dataset_code}'
         _logger.info(f'Getting dataset url: {url}')
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
+        client = get_client('DATASET_SERVICE')
+        response = await client.get(url)
         _logger.info(f'Getting dataset response: {response.text}')
         result = response.json().get('result')
+        if result:
+            dataset_cache.set(dataset_code, result, ConfigClass.DATASET_CACHE_TTL)
         return result
     except Exception:
         return None
@@ -77,6 +123,9 @@ async def get_dataset(dataset_code):
 async def list_datasets(user, page, page_size):
     """List all datasets."""
     _logger.info('list_datasets'.center(80, '-'))
+    result = dataset_list_cache.get((user, page, page_size))
+    if result is not None:
+        return result
     try:
         payload = {
             'page': page,
@@ -86,13 +135,15 @@ async def list_datasets(user, page, page_size):
             'order_by': 'created_at'
         }
         _logger.info(f'Listing dataset payload: {payload}')
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                ConfigClass.DATASET_SERVICE + f'/v1/users/{user}/datasets',
-                json=payload
-            )
+        client = get_client('DATASET_SERVICE')
+        response = await client.post(
+            ConfigClass.DATASET_SERVICE + f'/v1/users/{user}/datasets',
+            json=payload
+        )
         _logger.info(f'Listing dataset response: {response.text}')
         result = response.json().get('result')
+        if result is not None:
+            dataset_list_cache.set((user, page, page_size), result, ConfigClass.DATASET_CACHE_TTL)
         return result
     except Exception:
         return None
@@ -100,14 +151,21 @@ async def list_datasets(user, page, page_size):
 
 async def get_user_projects(current_identity, page, page_size, order, order_by):
     _logger.info('get_user_projects'.center(80, '-'))
-    projects_list = []
-    project_client = ProjectClient(ConfigClass.PROJECT_SERVICE, ConfigClass.REDIS_URI)
     if current_identity['role'] != 'admin':
         roles = current_identity['realm_roles']
         project_codes = [i.split('-')[0] for i in roles]
         project_codes = ','.join(project_codes)
+        role_key = tuple(sorted(set(roles)))
     else:
         project_codes = ''
+        role_key = ('admin',)
+    cache_key = (role_key, page, page_size, order, order_by)
+    projects_list = project_list_cache.get(cache_key)
+    if projects_list is not None:
+        _logger.info(f'Number of projects found in cache: {len(projects_list)}')
+        return projects_list
+    projects_list = []
+    project_client = get_project_client()
     project_res = await project_client.search(
         code_any=project_codes,
         page=page,
@@ -122,19 +180,27 @@ async def get_user_projects(current_identity, page, page_size, order, order_by):
         res_projects = {'name': p.name, 'code': p.code, 'geid': p.id}
         projects_list.append(res_projects)
     _logger.info(f'Number of projects found: {len(projects_list)}')
+    project_list_cache.set(cache_key, projects_list, ConfigClass.PROJECT_LIST_CACHE_TTL)
     return projects_list
 
 
 async def get_attribute_templates(project_code, manifest_name=None):
     _logger.info('get_attribute_templates'.center(80, '-'))
+    return await template_cache.get(
+        (project_code, manifest_name),
+        lambda: fetch_attribute_templates(project_code, manifest_name),
+    )
+
+
+async def fetch_attribute_templates(project_code, manifest_name=None):
     url = ConfigClass.METADATA_SERVICE + '/v1/template/'
     params = {'project_code': project_code}
     _logger.info(f'Getting: {url}')
     _logger.info(f'PARAMS: {params}')
     if manifest_name:
         params['name'] = manifest_name
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url=url, params=params)
+    client = get_client('METADATA_SERVICE')
+    response = await client.get(url=url, params=params)
     _logger.info(f'RESPONSE: {response.text}')
     if not response.json():
         return None
@@ -145,12 +211,12 @@ async def query_file_folder(params):
     _logger.info('query_file_folder'.center(80, '-'))
     try:
         _logger.info(f'query params: {params}')
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                ConfigClass.METADATA_SERVICE + '/v1/items/search/',
-                params=params,
-                follow_redirects=True,
-            )
+        client = get_client('METADATA_SERVICE')
+        response = await client.get(
+            ConfigClass.METADATA_SERVICE + '/v1/items/search/',
+            params=params,
+            follow_redirects=True,
+        )
         _logger.info(f'query response: {response.url}')
         _logger.info(f'query response: {response.text}')
         return response
@@ -158,6 +224,37 @@ async def query_file_folder(params):
         _logger.error(f'Error file/folder: {e}')
 
 
+def _version_record(attr):
+    return {
+        'dataset_code': attr['dataset_code'],
+        'dataset_geid': attr['dataset_geid'],
+        'version': attr['version'],
+        'created_by': attr['created_by'],
+        'created_at': str(attr['created_at']),
+        'location': attr['location'],
+        'notes': attr['notes']
+    }
+
+
+async def _fetch_dataset_versions(dataset_geid, page, page_size):
+    url = ConfigClass.DATASET_SERVICE + f'/v1/dataset/{dataset_geid}/versions'
+    _logger.info(f'url: {url}')
+    params = {
+        'dataset_geid': dataset_geid,
+        'page': page,
+        'page_size': page_size,
+        'order': 'desc',
+        'sorting': 'created_at'
+    }
+    client = get_client('DATASET_SERVICE')
+    res = await client.get(url, params=params)
+    _logger.info(f'Query result: {res.text}')
+    res_json = res.json()
+    records = [_version_record(attr) for attr in res_json.get('result') or []]
+    dataset_version_cache.add(dataset_geid, records, res_json.get('total'), newest=str(page) == '0')
+    return records
+
+
 async def get_dataset_versions(event):
     _logger.info('get_dataset_versions'.center(80, '-'))
     _logger.info(f'Query event: {event}')
@@ -165,35 +262,19 @@ async def get_dataset_versions(event):
         dataset_geid = event.get('dataset_geid')
         page = event.get('page')
         page_size = event.get('page_size')
-        dataset_versions = []
-        url = ConfigClass.DATASET_SERVICE + f'/v1/dataset/{dataset_geid}/versions'
-        _logger.info(f'url: {url}')
-        params = {
-            'dataset_geid': dataset_geid,
-            'page': page,
-            'page_size': page_size,
-            'order': 'desc',
-            'sorting': 'created_at'
-        }
-        async with httpx.AsyncClient() as client:
-            res = await client.get(url, params=params)
-        res_json = res.json()
-        result = res_json.get('result')
-        _logger.info(f'Query result: {res.text}')
-        if not result:
-            return []
-        for attr in result:
-            result = {
-                'dataset_code': attr['dataset_code'],
-                'dataset_geid': attr['dataset_geid'],
-                'version': attr['version'],
-                'created_by': attr['created_by'],
-                'created_at': str(attr['created_at']),
-                'location': attr['location'],
-                'notes': attr['notes']
-            }
-            dataset_versions.append(result)
-        return dataset_versions
+        if dataset_version_cache.is_checked(dataset_geid):
+            cached = dataset_version_cache.page(dataset_geid, int(page), int(page_size))
+            if cached is not None:
+                return cached
+            return await _fetch_dataset_versions(dataset_geid, page, page_size)
+        # the newest page tells whether versions were added since the last check
+        newest = await _fetch_dataset_versions(dataset_geid, 0, page_size)
+        if str(page) == '0':
+            return newest
+        cached = dataset_version_cache.page(dataset_geid, int(page), int(page_size))
+        if cached is not None:
+            return cached
+        return await _fetch_dataset_versions(dataset_geid, page, page_size)
     except Exception as e:
         _logger.error(f'Error getting dataset version: {e}')
 
@@ -224,8 +305,8 @@ class Annotations:
         _logger.info(f'PUT: {url}')
         _logger.info(f'PAYLOAD: {payload}')
         _logger.info(f'PARAMS: {params}')
-        async with httpx.AsyncClient() as client:
-            response = await client.put(url=url, params=params, json=payload)
+        client = get_client('METADATA_SERVICE')
+        response = await client.put(url=url, params=params, json=payload)
         _logger.info(f'RESPONSE: {response.text}')
         result = response.json().get('result')
         return result
@@ -242,8 +323,8 @@ class Annotations:
         _logger.info(f'PUT: {url}')
         _logger.info(f'PAYLOAD: {payload}')
         _logger.info(f'PARAMS: {params}')
-        async with httpx.AsyncClient() as client:
-            response = await client.put(url=url, params=params, json=payload)
+        client = get_client('METADATA_SERVICE')
+        response = await client.put(url=url, params=params, json=payload)
         _logger.info(f'RESPONSE: {response.text}')
         result = response.json().get('result')
         return result
@@ -13,18 +13,28 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import httpx
+import asyncio
+
 from common import LoggerFactory
 
+from .concurrency import gather_bounded
+from .hpc_token_cache import hpc_token_cache
+from .http_clients import get_client
 from ..config import ConfigClass
 from ..models.base_models import EAPIResponseCode
 from ..models.error_model import HPCError
 
 _logger = LoggerFactory('HPC').get_logger()
+# one submission limit per slurm host, shared by all requests
+submit_semaphores = {}
 
 
 async def get_hpc_jwt_token(token_issuer, username, password=None):
     _logger.info('get_hpc_jwt_token'.center(80, '-'))
+    cached = await hpc_token_cache.get(token_issuer, username, password)
+    if cached:
+        _logger.info(f'Using cached token for {username} from {token_issuer}')
+        return cached
     try:
         payload = {
             'token_issuer': token_issuer,
@@ -34,17 +44,66 @@ async def get_hpc_jwt_token(token_issuer, username, password=None):
         url = ConfigClass.HPC_SERVICE + '/v1/hpc/auth'
         _logger.info(f'Request url: {url}')
         _logger.info(f'Request payload: {payload}')
-        async with httpx.AsyncClient() as client:
-            res = await client.post(url, json=payload)
+        client = get_client('HPC_SERVICE')
+        res = await client.post(url, json=payload)
         _logger.info(f'Response: {res.text}')
         _logger.info(f'Response: {res.json()}')
         token = res.json().get('result')
+        if token:
+            await hpc_token_cache.set(token_issuer, username, password, token)
         return token
     except Exception as e:
         _logger.error(f'Error getting token: {e}')
         return ''
 
 
+def _host_semaphore(slurm_host) -> asyncio.Semaphore:
+    semaphore = submit_semaphores.get(slurm_host)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(max(ConfigClass.HPC_SUBMIT_CONCURRENCY_PER_HOST, 1))
+        submit_semaphores[slurm_host] = semaphore
+    return semaphore
+
+
+async def _post_hpc_job(slurm_host, protocol_type, username, token, job_info) -> dict:
+    url = ConfigClass.HPC_SERVICE + '/v1/hpc/job'
+    headers = {
+        'Authorization': token
+    }
+    payload = {
+        'slurm_host': slurm_host,
+        'username': username,
+        'job_info': job_info,
+        'protocol': protocol_type
+    }
+    _logger.info(f'Request url: {url}')
+    _logger.info(f'Request headers: {headers}')
+    _logger.info(f'Request payload: {payload}')
+    client = get_client('HPC_SERVICE')
+    async with _host_semaphore(slurm_host):
+        res = await client.post(url, headers=headers, json=payload)
+    _logger.info(f'Response: {res.json()}')
+    response = res.json()
+    status_code = response.get('code')
+    if status_code == 200:
+        result = response.get('result')
+        return result
+    elif status_code == 400:
+        msg = 'Jobs description entry not found, \
+            empty or not dictionary or list'
+        error_msg = response.get('error_msg')
+        if msg in error_msg:
+            raise HPCError(EAPIResponseCode.bad_request, msg)
+    elif status_code == 500:
+        error_msg = response.get('error_msg')
+        if 'Zero Bytes were transmitted or received' in error_msg:
+            await hpc_token_cache.evict(token)
+            raise HPCError(EAPIResponseCode.forbidden, 'HPC token expired')
+    else:
+        error_msg = response.get('error_msg')
+        raise HPCError(EAPIResponseCode.internal_error, error_msg)
+
+
 async def submit_hpc_job(job_submission_event) -> dict:
     _logger.info('submit_hpc_job'.center(80, '-'))
     try:
@@ -66,45 +125,48 @@ async def submit_hpc_job(job_submission_event) -> dict:
             status_code = EAPIResponseCode.bad_request
             error_msg = 'Missing script'
             raise HPCError(status_code, error_msg)
-        url = ConfigClass.HPC_SERVICE + '/v1/hpc/job'
-        headers = {
-            'Authorization': token
-        }
-        payload = {
-            'slurm_host': slurm_host,
-            'username': username,
-            'job_info': job_info,
-            'protocol': protocol_type
-        }
-        _logger.info(f'Request url: {url}')
-        _logger.info(f'Request headers: {headers}')
-        _logger.info(f'Request payload: {payload}')
-        async with httpx.AsyncClient() as client:
-            res = await client.post(url, headers=headers, json=payload)
-        _logger.info(f'Response: {res.json()}')
-        response = res.json()
-        status_code = response.get('code')
-        if status_code == 200:
-            result = response.get('result')
-            return result
-        elif status_code == 400:
-            msg = 'Jobs description entry not found, \
-                empty or not dictionary or list'
-            error_msg = response.get('error_msg')
-            if msg in error_msg:
-                raise HPCError(EAPIResponseCode.bad_request, msg)
-        elif status_code == 500:
-            error_msg = response.get('error_msg')
-            if 'Zero Bytes were transmitted or received' in error_msg:
-                raise HPCError(EAPIResponseCode.forbidden, 'HPC token expired')
-        else:
-            error_msg = response.get('error_msg')
-            raise HPCError(EAPIResponseCode.internal_error, error_msg)
+        return await _post_hpc_job(slurm_host, protocol_type, username, token, job_info)
     except Exception as e:
         _logger.error(f'Error submit job: {e}')
         raise e
 
 
+async def submit_hpc_jobs(host, username, token, jobs) -> list:
+    """Submit jobs to one host and return their results in order.
+
+    Every script is checked before anything is submitted. Submissions to a
+    slurm host share a limit of HPC_SUBMIT_CONCURRENCY_PER_HOST requests in
+    flight, and a job that fails maps to its error code and message.
+    """
+    _logger.info('submit_hpc_jobs'.center(80, '-'))
+    hpc_host = host.split('://')
+    if len(hpc_host) < 2:
+        raise HPCError(
+            EAPIResponseCode.bad_request,
+            'HPC protocal required')
+    slurm_host = hpc_host[1]
+    protocol_type = hpc_host[0]
+    missing = [str(index) for index, job_info in enumerate(jobs) if not job_info.get('script')]
+    if missing:
+        raise HPCError(
+            EAPIResponseCode.bad_request,
+            f'Missing script for jobs: {", ".join(missing)}')
+    _logger.info(f'Submitting {len(jobs)} jobs to {slurm_host}')
+
+    async def submit(job_info):
+        try:
+            result = await _post_hpc_job(slurm_host, protocol_type, username, token, job_info)
+            if not result:
+                raise HPCError(EAPIResponseCode.internal_error, 'Cannot submit HPC job')
+            return result
+        except HPCError as e:
+            return {'code': e.code.value, 'error_msg': e.error_msg}
+        except Exception as e:
+            return {'code': EAPIResponseCode.internal_error.value, 'error_msg': str(e)}
+
+    return await asyncio.gather(*[submit(job_info) for job_info in jobs])
+
+
 async def get_hpc_job_info(job_id, host, username, token) -> dict:
     _logger.info('get_hpc_job_info'.center(80, '-'))
     try:
@@ -128,8 +190,8 @@ async def get_hpc_job_info(job_id, host, username, token) -> dict:
         _logger.info(f'Request url: {url}')
         _logger.info(f'Request headers: {headers}')
         _logger.info(f'Request params: {params}')
-        async with httpx.AsyncClient() as client:
-            res = await client.get(url, headers=headers, params=params)
+        client = get_client('HPC_SERVICE')
+        res = await client.get(url, headers=headers, params=params)
         _logger.info(f'Response: {res.text}')
         response = res.json()
         status_code = response.get('code')
@@ -153,6 +215,34 @@ async def get_hpc_job_info(job_id, host, username, token) -> dict:
         raise e
 
 
+async def get_hpc_jobs_status(job_ids, host, username, token) -> dict:
+    """Return job information by job id, reading at most HPC_JOB_STATUS_CONCURRENCY jobs at once.
+
+    A job that cannot be read maps to its error code and message instead.
+    """
+    _logger.info('get_hpc_jobs_status'.center(80, '-'))
+    if len(host.split('://')) < 2:
+        raise HPCError(
+            EAPIResponseCode.bad_request,
+            'HPC protocal required')
+    job_ids = list(dict.fromkeys(job_ids))
+    _logger.info(f'Received {len(job_ids)} job ids')
+
+    async def job_status(job_id):
+        try:
+            return await get_hpc_job_info(job_id, host, username, token)
+        except HPCError as e:
+            return {'code': e.code.value, 'error_msg': e.error_msg}
+        except Exception as e:
+            return {'code': EAPIResponseCode.internal_error.value, 'error_msg': str(e)}
+
+    results = await gather_bounded(
+        [job_status(job_id) for job_id in job_ids],
+        ConfigClass.HPC_JOB_STATUS_CONCURRENCY,
+    )
+    return dict(zip(job_ids, results))
+
+
 async def get_hpc_nodes(host, username, hpc_token) -> dict:
     _logger.info('get_hpc_nodes'.center(80, '-'))
     try:
@@ -177,8 +267,8 @@ async def get_hpc_nodes(host, username, hpc_token) -> dict:
         _logger.info(f'Request url: {url}')
         _logger.info(f'Request headers: {headers}')
         _logger.info(f'Request params: {params}')
-        async with httpx.AsyncClient() as client:
-            res = await client.get(url, headers=headers, params=params)
+        client = get_client('HPC_SERVICE')
+        res = await client.get(url, headers=headers, params=params)
         _logger.info(f'Response: {res.text}')
         response = res.json()
         status_code = response.get('code')
@@ -219,8 +309,8 @@ async def get_hpc_node_by_name(host, username, hpc_token, node_name) -> dict:
         _logger.info(f'Request url: {url}')
         _logger.info(f'Request headers: {headers}')
         _logger.info(f'Request params: {params}')
-        async with httpx.AsyncClient() as client:
-            res = await client.get(url, headers=headers, params=params)
+        client = get_client('HPC_SERVICE')
+        res = await client.get(url, headers=headers, params=params)
         _logger.info(f'Response: {res.text}')
         response = res.json()
         status_code = response.get('code')
@@ -265,8 +355,8 @@ async def get_hpc_partitions(host, username, hpc_token) -> dict:
         _logger.info(f'Request url: {url}')
         _logger.info(f'Request headers: {headers}')
         _logger.info(f'Request params: {params}')
-        async with httpx.AsyncClient() as client:
-            res = await client.get(url, headers=headers, params=params)
+        client = get_client('HPC_SERVICE')
+        res = await client.get(url, headers=headers, params=params)
         _logger.info(f'Response: {res.text}')
         response = res.json()
         status_code = response.get('code')
@@ -313,8 +403,8 @@ async def get_hpc_partition_name(host, username, hpc_token, partition_name):
         _logger.info(f'Request url: {url}')
         _logger.info(f'Request headers: {headers}')
         _logger.info(f'Request params: {params}')
-        async with httpx.AsyncClient() as client:
-            res = await client.get(url, headers=headers, params=params)
+        client = get_client('HPC_SERVICE')
+        res = await client.get(url, headers=headers, params=params)
         _logger.info(f'Response: {res.text}')
         response = res.json()
         status_code = response.get('code')
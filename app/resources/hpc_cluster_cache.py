@@ -0,0 +1,179 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+
+from common import LoggerFactory
+
+from .hpc import get_hpc_node_by_name
+from .hpc import get_hpc_nodes
+from .hpc import get_hpc_partition_name
+from .hpc import get_hpc_partitions
+from .periodic import PeriodicRefresher
+from ..config import ConfigClass
+
+_logger = LoggerFactory('HPCClusterCache').get_logger()
+
+FETCHERS = {
+    'nodes': get_hpc_nodes,
+    'partitions': get_hpc_partitions,
+}
+
+
+class ClusterSnapshot(PeriodicRefresher):
+    """Nodes and partitions of one slurm host, as listed for one user and token.
+
+    Each kind is loaded on first use and then refreshed in the background
+    every HPC_SNAPSHOT_REFRESH_INTERVAL seconds while it is being read.
+    """
+
+    def __init__(self, host, username, token):
+        super().__init__()
+        self.host = host
+        self.username = username
+        self.token = token
+        self.last_used = time.monotonic()
+        self._data = {}
+        self._locks = {kind: asyncio.Lock() for kind in FETCHERS}
+
+    @property
+    def interval(self):
+        return ConfigClass.HPC_SNAPSHOT_REFRESH_INTERVAL
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._data)
+
+    @property
+    def idle(self) -> bool:
+        return time.monotonic() - self.last_used > ConfigClass.HPC_SNAPSHOT_IDLE_TIMEOUT
+
+    def _age(self, kind):
+        return time.monotonic() - self._data[kind][1] if kind in self._data else None
+
+    async def _load(self, kind):
+        result = await FETCHERS[kind](self.host, self.username, self.token)
+        self._data[kind] = (result, time.monotonic())
+        return result
+
+    async def refresh(self):
+        if self.idle:
+            return
+        for kind in list(self._data):
+            # skip what a request has just loaded, e.g. right after start()
+            if self._age(kind) < self.interval / 2:
+                continue
+            try:
+                await self._load(kind)
+            except Exception as e:
+                _logger.error(f'Error refreshing hpc {kind} of {self.host}: {e}')
+
+    async def get(self, kind):
+        """Return the snapshot of kind, loading it when missing or too old."""
+        self.last_used = time.monotonic()
+        age = self._age(kind)
+        if age is not None and age < ConfigClass.HPC_SNAPSHOT_MAX_AGE:
+            return self._data[kind][0]
+        async with self._locks[kind]:
+            age = self._age(kind)
+            if age is not None and age < ConfigClass.HPC_SNAPSHOT_MAX_AGE:
+                return self._data[kind][0]
+            return await self._load(kind)
+
+
+class HPCClusterCache(PeriodicRefresher):
+    """Cluster snapshots keyed by (host, username, token).
+
+    However many clients poll the same host with the same credentials, the
+    HPC service is asked for nodes and partitions once per refresh interval.
+    The token is part of the key so a snapshot is only served to requests
+    presenting the token it was loaded with. The cache itself runs in the
+    background to stop and drop snapshots nobody has read for a while.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._snapshots = {}
+
+    @property
+    def interval(self):
+        return ConfigClass.HPC_SNAPSHOT_REFRESH_INTERVAL
+
+    async def refresh(self):
+        for key, snapshot in list(self._snapshots.items()):
+            if snapshot.idle:
+                self._snapshots.pop(key, None)
+                await snapshot.stop()
+
+    async def _get(self, kind, host, username, token):
+        self.start()
+        key = (host, username, token)
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            snapshot = self._snapshots[key] = ClusterSnapshot(host, username, token)
+        try:
+            result = await snapshot.get(kind)
+        except Exception:
+            if not snapshot.loaded:
+                self._snapshots.pop(key, None)
+            raise
+        snapshot.start()
+        return result
+
+    async def _find(self, kind, host, username, token, name):
+        try:
+            result = await self._get(kind, host, username, token)
+        except Exception as e:
+            _logger.info(f'Cannot load hpc {kind} snapshot: {e}')
+            return None
+        found = [entry for entry in result or [] if name in entry]
+        return found or None
+
+    async def nodes(self, host, username, token):
+        return await self._get('nodes', host, username, token)
+
+    async def partitions(self, host, username, token):
+        return await self._get('partitions', host, username, token)
+
+    async def node(self, host, username, token, node_name):
+        """Serve one node from the snapshot, asking the HPC service if it is not there."""
+        found = await self._find('nodes', host, username, token, node_name)
+        if found is None:
+            return await get_hpc_node_by_name(host, username, token, node_name)
+        return found
+
+    async def partition(self, host, username, token, partition_name):
+        """Serve one partition from the snapshot, asking the HPC service if it is not there."""
+        found = await self._find('partitions', host, username, token, partition_name)
+        if found is None:
+            return await get_hpc_partition_name(host, username, token, partition_name)
+        return found
+
+    async def close(self):
+        await self.stop()
+        snapshots = list(self._snapshots.values())
+        self._snapshots.clear()
+        for snapshot in snapshots:
+            await snapshot.stop()
+
+    def clear(self):
+        self.cancel()
+        for snapshot in self._snapshots.values():
+            snapshot.cancel()
+        self._snapshots.clear()
+
+
+hpc_cluster_cache = HPCClusterCache()
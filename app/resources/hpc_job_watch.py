@@ -0,0 +1,154 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+
+from common import LoggerFactory
+
+from .hpc import get_hpc_job_info
+from ..config import ConfigClass
+from ..models.error_model import HPCError
+
+_logger = LoggerFactory('HPCJobWatch').get_logger()
+
+FINISHED_STATES = frozenset({
+    'BOOT_FAIL',
+    'CANCELLED',
+    'COMPLETED',
+    'DEADLINE',
+    'FAILED',
+    'NODE_FAIL',
+    'OUT_OF_MEMORY',
+    'PREEMPTED',
+    'TIMEOUT',
+})
+
+
+def is_finished(job_info) -> bool:
+    # slurm reports e.g. 'CANCELLED by 1000'
+    state = (job_info or {}).get('job_state') or ''
+    return state.split(' ')[0] in FINISHED_STATES
+
+
+class JobPoller:
+    """Poll one HPC job and publish every change to all of its watchers.
+
+    Events are ('state', job_info) or ('error', {'code', 'error_msg'}); the
+    stream ends with None once the job finished or polling gave up.
+    """
+
+    def __init__(self, job_id, host, username, token):
+        self.job_id = job_id
+        self.host = host
+        self.username = username
+        self.token = token
+        self._queues = set()
+        self._task = None
+        self._latest = None
+        self.finished = False
+
+    @property
+    def watchers(self) -> int:
+        return len(self._queues)
+
+    def _publish(self, event):
+        if event is not None:
+            self._latest = event
+        for queue in self._queues:
+            queue.put_nowait(event)
+
+    def _finish(self):
+        self.finished = True
+        self._publish(None)
+
+    async def _poll(self):
+        failures = 0
+        while True:
+            try:
+                job_info = await get_hpc_job_info(self.job_id, self.host, self.username, self.token)
+                failures = 0
+            except HPCError as e:
+                self._publish(('error', {'code': e.code.value, 'error_msg': e.error_msg}))
+                return self._finish()
+            except Exception as e:
+                failures += 1
+                _logger.error(f'Error polling hpc job {self.job_id} ({failures}): {e}')
+                if failures >= ConfigClass.HPC_JOB_WATCH_MAX_FAILURES:
+                    self._publish(('error', {'code': 500, 'error_msg': str(e)}))
+                    return self._finish()
+            else:
+                if self._latest is None or self._latest[1] != job_info:
+                    self._publish(('state', job_info))
+                if is_finished(job_info):
+                    return self._finish()
+            await asyncio.sleep(ConfigClass.HPC_JOB_WATCH_INTERVAL)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        if self._latest is not None:
+            queue.put_nowait(self._latest)
+        if self.finished:
+            queue.put_nowait(None)
+        self._queues.add(queue)
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._poll())
+        return queue
+
+    def unsubscribe(self, queue):
+        self._queues.discard(queue)
+        if not self._queues:
+            self.close()
+
+    def close(self):
+        self._queues.clear()
+        if self._task is not None:
+            self._task.cancel()
+
+
+class HPCJobWatch:
+    """One shared poller per (host, username, token, job_id) however many clients watch."""
+
+    def __init__(self):
+        self._pollers = {}
+
+    async def watch(self, job_id, host, username, token):
+        """Yield job events as they happen, and None as a keepalive when nothing did."""
+        key = (host, username, token, job_id)
+        poller = self._pollers.get(key)
+        if poller is None or poller.finished:
+            poller = self._pollers[key] = JobPoller(job_id, host, username, token)
+        queue = poller.subscribe()
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), ConfigClass.HPC_JOB_WATCH_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if event is None:
+                    return
+                yield event
+        finally:
+            poller.unsubscribe(queue)
+            if not poller.watchers and self._pollers.get(key) is poller:
+                del self._pollers[key]
+
+    def clear(self):
+        for poller in self._pollers.values():
+            poller.close()
+        self._pollers.clear()
+
+
+hpc_job_watch = HPCJobWatch()
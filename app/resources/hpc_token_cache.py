@@ -0,0 +1,110 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import hmac
+import json
+import time
+
+import jwt as pyjwt
+from common import LoggerFactory
+
+from .redis_client import get_redis
+from ..config import ConfigClass
+
+_logger = LoggerFactory('HPCTokenCache').get_logger()
+
+CACHE_PREFIX = 'bff_cli-hpc-token-'
+OWNER_PREFIX = 'bff_cli-hpc-token-owner-'
+
+
+class HPCTokenCache:
+    """HPC tokens shared by all workers through redis.
+
+    Keys are built from the token issuer, the username and a keyed hash of
+    the password, so a wrong password never matches a cached token. The
+    cache stays off without a CLI_SECRET to key that hash. Each token also
+    points back to its key, so a token rejected by HPC can be evicted.
+    """
+
+    @staticmethod
+    def _enabled():
+        return ConfigClass.HPC_TOKEN_CACHE_ENABLED and bool(ConfigClass.CLI_SECRET)
+
+    @staticmethod
+    def _key(token_issuer, username, password):
+        digest = hmac.new(
+            ConfigClass.CLI_SECRET.encode(),
+            f'{token_issuer}\0{username}\0{password or ""}'.encode(),
+            hashlib.sha256,
+        ).hexdigest()
+        return f'{CACHE_PREFIX}{token_issuer}:{username}:{digest}'
+
+    @staticmethod
+    def _owner_key(token):
+        return OWNER_PREFIX + hashlib.sha256(str(token).encode()).hexdigest()
+
+    @staticmethod
+    def _token(result):
+        return result.get('token') if isinstance(result, dict) else result
+
+    def _ttl(self, result):
+        """Seconds the token may be reused, ending shortly before it expires."""
+        ttl = ConfigClass.HPC_TOKEN_CACHE_TTL
+        token = self._token(result)
+        try:
+            expires_at = pyjwt.decode(token, verify=False).get('exp')
+        except Exception:
+            expires_at = None
+        if expires_at:
+            ttl = min(ttl, int(expires_at - time.time()) - ConfigClass.HPC_TOKEN_EXPIRY_MARGIN)
+        return ttl
+
+    async def get(self, token_issuer, username, password):
+        if not self._enabled():
+            return None
+        try:
+            value = await get_redis().get(self._key(token_issuer, username, password))
+        except Exception as e:
+            _logger.error(f'Error reading hpc token cache: {e}')
+            return None
+        return json.loads(value) if value is not None else None
+
+    async def set(self, token_issuer, username, password, result):
+        ttl = self._ttl(result)
+        if not self._enabled() or ttl <= 0:
+            return
+        key = self._key(token_issuer, username, password)
+        try:
+            redis = get_redis()
+            await redis.set(key, json.dumps(result), ex=ttl)
+            await redis.set(self._owner_key(self._token(result)), key, ex=ttl)
+        except Exception as e:
+            _logger.error(f'Error writing hpc token cache: {e}')
+
+    async def evict(self, token):
+        """Stop handing out a token that HPC rejected."""
+        if not self._enabled():
+            return
+        owner_key = self._owner_key(token)
+        try:
+            redis = get_redis()
+            key = await redis.get(owner_key)
+            await redis.delete(owner_key, *([key] if key is not None else []))
+        except Exception as e:
+            _logger.error(f'Error evicting hpc token: {e}')
+
+
+hpc_token_cache = HPCTokenCache()
@@ -0,0 +1,85 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from typing import Dict
+
+import httpx
+from common import LoggerFactory
+
+from ..config import ConfigClass
+
+_logger = LoggerFactory('HTTPClients').get_logger()
+
+SERVICES = [
+    'AUTH_SERVICE',
+    'METADATA_SERVICE',
+    'DATASET_SERVICE',
+    'PROJECT_SERVICE',
+    'HPC_SERVICE',
+    'KG_SERVICE',
+    'AUDIT_TRAIL_SERVICE',
+    'UPLOAD_SERVICE_GREENROOM',
+    'UPLOAD_SERVICE_CORE',
+]
+
+
+class ServiceClients:
+    """Keep one keep-alive connection pool per downstream service."""
+
+    def __init__(self):
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._ssl_context = None
+
+    def _limits(self, service: str) -> httpx.Limits:
+        max_connections = ConfigClass.HTTPX_POOL_LIMITS.get(
+            service, ConfigClass.HTTPX_MAX_CONNECTIONS)
+        return httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(
+                max_connections, ConfigClass.HTTPX_MAX_KEEPALIVE_CONNECTIONS),
+            keepalive_expiry=ConfigClass.HTTPX_KEEPALIVE_EXPIRY,
+        )
+
+    def get(self, service: str) -> httpx.AsyncClient:
+        client = self._clients.get(service)
+        if client is None or client.is_closed:
+            if self._ssl_context is None:
+                self._ssl_context = httpx.create_ssl_context()
+            client = httpx.AsyncClient(
+                limits=self._limits(service), verify=self._ssl_context)
+            self._clients[service] = client
+        return client
+
+    def open(self):
+        for service in SERVICES:
+            self.get(service)
+        _logger.info(f'Opened http clients for: {list(self._clients)}')
+
+    async def close(self):
+        clients, self._clients = self._clients, {}
+        for service, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:
+                _logger.error(f'Error closing http client {service}: {e}')
+        _logger.info(f'Closed http clients for: {list(clients)}')
+
+
+service_clients = ServiceClients()
+
+
+def get_client(service: str) -> httpx.AsyncClient:
+    """Return the shared client of a service named as in ConfigClass."""
+    return service_clients.get(service)
@@ -0,0 +1,67 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import asyncio
+from abc import ABC
+from abc import abstractmethod
+
+from common import LoggerFactory
+
+_logger = LoggerFactory('Periodic').get_logger()
+
+
+class PeriodicRefresher(ABC):
+    """Run refresh() now and then every interval seconds in the background."""
+
+    interval = 60
+
+    def __init__(self):
+        self._task = None
+
+    @abstractmethod
+    async def refresh(self):
+        """Load the latest state, called every interval seconds."""
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                _logger.error(f'Error refreshing {type(self).__name__}: {e}')
+            await asyncio.sleep(self.interval)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.ensure_future(self._run())
+
+    def cancel(self):
+        """Cancel the background task without waiting for it to finish."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,90 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from common import LoggerFactory
+
+from .cache import TTLCache
+from .cache_invalidation import SharedInvalidations
+from .redis_client import get_redis
+from ..config import ConfigClass
+
+_logger = LoggerFactory('PermissionCache').get_logger()
+
+CACHE_PREFIX = 'bff_cli-permission-'
+
+
+class PermissionCache:
+    """Authorization decisions keyed by (role, resource, zone, operation).
+
+    Memory is checked first, then redis when PERMISSION_CACHE_REDIS is on.
+    Invalidations reach the memory of other workers through SharedInvalidations.
+    """
+
+    def __init__(self):
+        self._local = TTLCache(maxsize=4096, ttl=ConfigClass.PERMISSION_CACHE_TTL)
+        self._invalidations = SharedInvalidations('permission')
+
+    @staticmethod
+    def _redis_key(key):
+        return CACHE_PREFIX + ':'.join(str(part) for part in key)
+
+    async def get(self, key):
+        if await self._invalidations.poll():
+            self._local.clear()
+        permission = self._local.get(key)
+        if permission is not None or not ConfigClass.PERMISSION_CACHE_REDIS:
+            return permission
+        try:
+            value = await get_redis().get(self._redis_key(key))
+        except Exception as e:
+            _logger.error(f'Error reading permission cache: {e}')
+            return None
+        if value is None:
+            return None
+        permission = value == b'1'
+        self._local.set(key, permission, ConfigClass.PERMISSION_CACHE_TTL)
+        return permission
+
+    async def set(self, key, permission):
+        self._local.set(key, permission, ConfigClass.PERMISSION_CACHE_TTL)
+        if not ConfigClass.PERMISSION_CACHE_REDIS:
+            return
+        try:
+            await get_redis().set(
+                self._redis_key(key),
+                '1' if permission else '0',
+                ex=ConfigClass.PERMISSION_CACHE_TTL,
+            )
+        except Exception as e:
+            _logger.error(f'Error writing permission cache: {e}')
+
+    async def invalidate(self):
+        """Drop every cached decision, in the memory of every worker and in redis."""
+        self._local.clear()
+        await self._invalidations.publish()
+        if not ConfigClass.PERMISSION_CACHE_REDIS:
+            return
+        redis = get_redis()
+        keys = [key async for key in redis.scan_iter(match=CACHE_PREFIX + '*')]
+        if keys:
+            await redis.delete(*keys)
+        _logger.info(f'Invalidated {len(keys)} shared permission decisions')
+
+    def clear(self):
+        self._local.clear()
+        self._invalidations.clear()
+
+
+permission_cache = PermissionCache()
@@ -0,0 +1,79 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import Optional
+
+from common import LoggerFactory
+
+from .http_clients import get_client
+from .periodic import PeriodicRefresher
+from ..config import ConfigClass
+
+_logger = LoggerFactory('PolicyEngine').get_logger()
+
+
+class PolicyEngine(PeriodicRefresher):
+    """In-memory copy of the auth service authorization matrix.
+
+    Rows are (role, resource, zone, operation) tuples that are allowed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._allowed = frozenset()
+        self._roles = frozenset()
+
+    @property
+    def interval(self):
+        return ConfigClass.POLICY_ENGINE_REFRESH_INTERVAL
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._roles)
+
+    def load(self, rules):
+        allowed = set()
+        roles = set()
+        for rule in rules:
+            key = (rule['role'], rule['resource'], rule['zone'], rule['operation'])
+            roles.add(rule['role'])
+            if rule.get('has_permission', True):
+                allowed.add(key)
+        self._allowed = frozenset(allowed)
+        self._roles = frozenset(roles)
+        _logger.info(f'Loaded {len(allowed)} permission rules for roles: {sorted(roles)}')
+
+    async def refresh(self):
+        _logger.info('refresh permission matrix'.center(80, '-'))
+        client = get_client('AUTH_SERVICE')
+        response = await client.get(
+            ConfigClass.AUTH_SERVICE + ConfigClass.POLICY_ENGINE_MATRIX_ENDPOINT
+        )
+        response.raise_for_status()
+        self.load(response.json()['result'])
+
+    def check(self, role, resource, zone, operation) -> Optional[bool]:
+        """Return the decision, or None when the role is not in the matrix."""
+        if role not in self._roles:
+            return None
+        return (role, resource, zone, operation) in self._allowed
+
+    def clear(self):
+        self._allowed = frozenset()
+        self._roles = frozenset()
+
+
+policy_engine = PolicyEngine()
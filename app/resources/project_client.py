@@ -0,0 +1,60 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from common.project.project_client import ProjectClient
+from common.project.project_exceptions import ProjectException
+from common.project.project_exceptions import ProjectNotFoundException
+
+from .cache import TTLCache
+from .http_clients import get_client
+from .redis_client import get_redis
+from ..config import ConfigClass
+
+_project_client = None
+project_list_cache = TTLCache(maxsize=4096, ttl=ConfigClass.PROJECT_LIST_CACHE_TTL)
+
+
+class SharedProjectClient(ProjectClient):
+    """ProjectClient on the shared redis pool and project service http client."""
+
+    async def connect_redis(self):
+        self.redis = get_redis()
+
+    async def search(self, page=None, page_size=None, order_by=None, order_type=None, **kwargs):
+        data = {
+            'page': page,
+            'page_size': page_size,
+            'sort_by': order_by,
+            'sort_order': order_type,
+            **kwargs,
+        }
+        data = {k: v for k, v in data.items() if v is not None}
+        client = get_client('PROJECT_SERVICE')
+        response = await client.get(self.base_url + '/v1/projects/', params=data)
+        if response.status_code == 404:
+            raise ProjectNotFoundException
+        elif response.status_code != 200:
+            raise ProjectException(status_code=response.status_code, error_msg=response.json())
+        result = response.json()
+        result['result'] = [self.project_object(item, self) for item in result['result']]
+        return result
+
+
+def get_project_client() -> SharedProjectClient:
+    """Return the process wide project client."""
+    global _project_client
+    if _project_client is None:
+        _project_client = SharedProjectClient(ConfigClass.PROJECT_SERVICE, ConfigClass.REDIS_URI)
+    return _project_client
@@ -0,0 +1,41 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from aioredis import StrictRedis
+
+from ..config import ConfigClass
+
+_redis = None
+
+
+def get_redis() -> StrictRedis:
+    """Return the process wide redis client sharing one connection pool."""
+    global _redis
+    if _redis is None:
+        _redis = StrictRedis(
+            host=ConfigClass.REDIS_HOST,
+            port=ConfigClass.REDIS_PORT,
+            db=ConfigClass.REDIS_DB,
+            password=ConfigClass.REDIS_PASSWORD
+        )
+    return _redis
+
+
+async def close_redis():
+    global _redis
+    if _redis is not None:
+        await _redis.close()
+        await _redis.connection_pool.disconnect()
+        _redis = None
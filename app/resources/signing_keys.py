@@ -0,0 +1,93 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import base64
+import time
+
+import jwt as pyjwt
+from common import LoggerFactory
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.asymmetric.rsa import RSAPublicNumbers
+
+from .http_clients import get_client
+from .periodic import PeriodicRefresher
+from ..config import ConfigClass
+
+_logger = LoggerFactory('SigningKeys').get_logger()
+
+# minimum seconds between two fetches triggered by an unknown key id
+MIN_REFRESH_INTERVAL = 30
+
+
+def _b64_to_int(value):
+    padded = value + '=' * (-len(value) % 4)
+    return int.from_bytes(base64.urlsafe_b64decode(padded), 'big')
+
+
+def jwk_to_public_key(jwk):
+    numbers = RSAPublicNumbers(_b64_to_int(jwk['e']), _b64_to_int(jwk['n']))
+    return numbers.public_key(default_backend())
+
+
+class SigningKeys(PeriodicRefresher):
+    """Cached JWKS of the identity provider, refreshed periodically."""
+
+    def __init__(self):
+        super().__init__()
+        self._keys = {}
+        self._fetched_at = 0
+
+    @property
+    def interval(self):
+        return ConfigClass.JWT_JWKS_REFRESH_INTERVAL
+
+    async def refresh(self):
+        _logger.info('refresh signing keys'.center(80, '-'))
+        self._fetched_at = time.monotonic()
+        # the JWKS endpoint belongs to authentication, share the auth service client
+        client = get_client('AUTH_SERVICE')
+        response = await client.get(ConfigClass.JWT_JWKS_URL)
+        response.raise_for_status()
+        keys = {}
+        for jwk in response.json().get('keys', []):
+            if jwk.get('kty') != 'RSA' or jwk.get('use', 'sig') != 'sig':
+                continue
+            keys[jwk.get('kid')] = jwk_to_public_key(jwk)
+        self._keys = keys
+        _logger.info(f'Loaded signing keys: {list(keys)}')
+
+    async def get_key(self, kid):
+        key = self._keys.get(kid)
+        if key is None and time.monotonic() - self._fetched_at > MIN_REFRESH_INTERVAL:
+            await self.refresh()
+            key = self._keys.get(kid)
+        return key
+
+
+signing_keys = SigningKeys()
+
+
+async def verify_token(token):
+    """Decode the token and check its signature against the cached JWKS."""
+    header = pyjwt.get_unverified_header(token)
+    key = await signing_keys.get_key(header.get('kid'))
+    if key is None:
+        raise pyjwt.InvalidTokenError('Unknown signing key')
+    return pyjwt.decode(
+        token,
+        key=key,
+        algorithms=['RS256'],
+        options={'verify_aud': False},
+    )
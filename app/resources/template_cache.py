@@ -0,0 +1,109 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+
+from common import LoggerFactory
+
+from .cache import TTLCache
+from .cache_invalidation import ALL_SCOPES
+from .cache_invalidation import SharedInvalidations
+from ..config import ConfigClass
+
+_logger = LoggerFactory('TemplateCache').get_logger()
+
+
+class TemplateCache:
+    """Attribute templates keyed by (project_code, name).
+
+    Entries are fresh for TEMPLATE_CACHE_TTL seconds. For another
+    TEMPLATE_CACHE_STALE_TTL seconds the stale value is still served while
+    one background fetch refreshes it. Concurrent misses share one fetch.
+    Invalidations reach the other workers through SharedInvalidations.
+    """
+
+    def __init__(self):
+        self._entries = TTLCache(maxsize=ConfigClass.TEMPLATE_CACHE_MAXSIZE)
+        self._inflight = {}
+        self._invalidations = SharedInvalidations('template')
+
+    def _store(self, key, templates):
+        if not templates or templates.get('code') != 200:
+            return
+        ttl = ConfigClass.TEMPLATE_CACHE_TTL
+        self._entries.set(
+            key, (templates, time.monotonic() + ttl), ttl + ConfigClass.TEMPLATE_CACHE_STALE_TTL
+        )
+
+    async def _fetch(self, key, fetch):
+        try:
+            templates = await fetch()
+            self._store(key, templates)
+            return templates
+        finally:
+            self._inflight.pop(key, None)
+
+    def _fetch_once(self, key, fetch):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, fetch))
+            self._inflight[key] = task
+        return task
+
+    async def get(self, key, fetch):
+        """Return the cached templates for key, calling fetch() on a miss."""
+        for scope in await self._invalidations.poll():
+            self._drop(None if scope == ALL_SCOPES else scope)
+        entry = self._entries.get(key)
+        if entry is None:
+            return await asyncio.shield(self._fetch_once(key, fetch))
+        templates, fresh_until = entry
+        if fresh_until <= time.monotonic() and key not in self._inflight:
+            _logger.info(f'Revalidating stale templates for {key}')
+            task = self._fetch_once(key, fetch)
+            task.add_done_callback(self._log_refresh_error)
+        return templates
+
+    @staticmethod
+    def _log_refresh_error(task):
+        if not task.cancelled() and task.exception() is not None:
+            _logger.error(f'Error revalidating templates: {task.exception()}')
+
+    def _drop(self, project_code):
+        if project_code is None:
+            count = len(self._entries)
+            self._entries.clear()
+        else:
+            keys = [key for key in self._entries.keys() if key[0] == project_code]
+            for key in keys:
+                self._entries.pop(key)
+            count = len(keys)
+        _logger.info(f'Invalidated {count} cached templates')
+        return count
+
+    async def invalidate(self, project_code=None):
+        """Drop cached templates in every worker, for one project or for all of them."""
+        count = self._drop(project_code)
+        await self._invalidations.publish(project_code or ALL_SCOPES)
+        return count
+
+    def clear(self):
+        self._entries.clear()
+        self._inflight.clear()
+        self._invalidations.clear()
+
+
+template_cache = TemplateCache()
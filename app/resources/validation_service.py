@@ -13,7 +13,9 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
 import base64
+from functools import lru_cache
 
 from common import LoggerFactory
 from cryptography.fernet import Fernet
@@ -21,33 +23,37 @@ from cryptography.hazmat.backends import default_backend
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+from .cache import TTLCache
+from ..config import ConfigClass
 from ..models.error_model import InvalidEncryptionError
 from ..models.error_model import ValidationError
 from ..resources.error_handler import ECustomizedError
 from ..resources.error_handler import customized_error_template
 
 _logger = LoggerFactory('validation_service').get_logger()
+validation_plans = TTLCache(maxsize=1024, ttl=ConfigClass.VALIDATION_PLAN_CACHE_TTL)
+decrypted_messages = TTLCache(maxsize=ConfigClass.DECRYPTION_CACHE_SIZE, ttl=ConfigClass.DECRYPTION_CACHE_TTL)
 
 
-def decryption(encrypted_message, secret):
-    """
-    decrypt byte that encrypted by encryption function
-    encrypted_message: the string that need to decrypt to string
-    secret: the string type secret key used to encrypt message
-    return: string of the message
-    """
+@lru_cache(maxsize=16)
+def derive_fernet(secret):
+    """Derive the Fernet key of a secret once, PBKDF2 is deliberately slow."""
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=base64.b64decode(secret),
+        iterations=100000,
+        backend=default_backend()
+    )
+    # use the key from current device information
+    key = base64.urlsafe_b64encode(
+        kdf.derive('SECRETKEYPASSWORD'.encode()))
+    return Fernet(key)
+
+
+def _decrypt(encrypted_message, secret):
     try:
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=base64.b64decode(secret),
-            iterations=100000,
-            backend=default_backend()
-        )
-        # use the key from current device information
-        key = base64.urlsafe_b64encode(
-            kdf.derive('SECRETKEYPASSWORD'.encode()))
-        f = Fernet(key)
+        f = derive_fernet(secret)
         decrypted = f.decrypt(base64.b64decode(encrypted_message))
         return decrypted.decode()
     except Exception:
@@ -56,60 +62,91 @@ def decryption(encrypted_message, secret):
         )
 
 
-class ManifestValidator:
+async def decryption(encrypted_message, secret):
+    """
+    decrypt byte that encrypted by encryption function
+    encrypted_message: the string that need to decrypt to string
+    secret: the string type secret key used to encrypt message
+    return: string of the message
+    """
+    key = (secret, encrypted_message)
+    decrypted = decrypted_messages.get(key)
+    if decrypted is None:
+        loop = asyncio.get_event_loop()
+        decrypted = await loop.run_in_executor(None, _decrypt, encrypted_message, secret)
+        decrypted_messages.set(key, decrypted)
+    return decrypted
 
-    def __init__(self, current_attribute, target_attribute):
-        self.current_attribute = current_attribute
+
+class ValidationPlan:
+    """Manifest template compiled once for repeated attribute validation."""
+
+    def __init__(self, target_attribute):
         self.target_attribute = target_attribute
+        self.names = frozenset(attr.get('name') for attr in target_attribute)
+        self.checks = tuple(
+            (attr.get('name'), attr.get('optional'), attr.get('type'), self._options(attr.get('options')))
+            for attr in target_attribute
+        )
+
+    @staticmethod
+    def _options(options):
+        options = options or []
+        try:
+            return frozenset(options), options
+        except TypeError:
+            return None, options
+
+    @staticmethod
+    def _is_valid_choice(value, options):
+        option_set, option_list = options
+        if option_set is not None:
+            try:
+                return value in option_set
+            except TypeError:
+                pass
+        return value in option_list
 
-    def validate_attributes_name(self):
-        _logger.info('validate_attributes_name'.center(80, '-'))
-        allowed_attributes = [attr.get('name') for attr in self.target_attribute]
-        for attr in self.current_attribute.keys():
-            if attr not in allowed_attributes:
-                error = f'invalid attribute {attr}'
-                _logger.error(f'Error attribute field: {error}')
-                raise ValidationError(error)
-
-    def validate_non_optional_attribute_field(self, attr):
-        _logger.info('validate_non_optional_attribute_field'.center(80, '-'))
-        required_attr = attr.get('name')
-        if not attr.get('optional') and required_attr not in self.current_attribute.keys():
-            error = customized_error_template(ECustomizedError.FIELD_REQUIRED) % required_attr
-            _logger.error(f'Error attribute field: {error}')
-            raise ValidationError(error)
-        elif not self.current_attribute.get(required_attr):
-            error = customized_error_template(ECustomizedError.MISSING_REQUIRED_ATTRIBUTES) % required_attr
-            _logger.error(f'Error attribute field: {error}')
-            raise ValidationError(error)
-
-    def validate_attribute_value(self, attr):
-        _logger.info('validate_attribute_value'.center(80, '-'))
-        attr_name = attr.get('name')
-        current_attr = self.current_attribute.get(attr_name)
-        if not current_attr:
-            error = f'Invalid attr: {attr}'
-            _logger.error(f'Error attribute field: {error}')
-            raise ValidationError(error)
-        attr_name = attr.get('name')
-        exceed_length = len(current_attr) > 100
-        valid_choice = attr.get('options')
-        if attr.get('type') == 'text' and exceed_length:
-            error = customized_error_template(ECustomizedError.TEXT_TOO_LONG) % attr_name
-            _logger.error(f'Error attribute field: {error}')
-            raise ValidationError(error)
-        elif attr.get('type') == 'multiple_choice' and current_attr not in valid_choice:
-            error = customized_error_template(ECustomizedError.INVALID_CHOICE) % attr_name
-            _logger.error(f'Error attribute field: {error}')
-            raise ValidationError(error)
+    def validate(self, current_attribute):
+        """Raise ValidationError for the first invalid attribute."""
+        for attr in current_attribute:
+            if attr not in self.names:
+                raise ValidationError(f'invalid attribute {attr}')
+        for name, optional, attr_type, options in self.checks:
+            if not optional and name not in current_attribute:
+                raise ValidationError(customized_error_template(ECustomizedError.FIELD_REQUIRED) % name)
+            value = current_attribute.get(name)
+            if not value:
+                raise ValidationError(customized_error_template(ECustomizedError.MISSING_REQUIRED_ATTRIBUTES) % name)
+            if attr_type == 'text' and len(value) > 100:
+                raise ValidationError(customized_error_template(ECustomizedError.TEXT_TOO_LONG) % name)
+            if attr_type == 'multiple_choice' and not self._is_valid_choice(value, options):
+                raise ValidationError(customized_error_template(ECustomizedError.INVALID_CHOICE) % name)
+
+
+def get_validation_plan(target_attribute, template_id=None):
+    """Return the compiled plan of a template, cached by template id."""
+    if template_id is None:
+        return ValidationPlan(target_attribute)
+    plan = validation_plans.get(template_id)
+    if plan is None or (
+        plan.target_attribute is not target_attribute and plan.target_attribute != target_attribute
+    ):
+        plan = ValidationPlan(target_attribute)
+        validation_plans.set(template_id, plan)
+    return plan
+
+
+class ManifestValidator:
+
+    def __init__(self, current_attribute, target_attribute, template_id=None):
+        self.current_attribute = current_attribute
+        self.plan = get_validation_plan(target_attribute, template_id)
 
     async def has_valid_attributes(self):
         _logger.info('has_valid_attributes'.center(80, '-'))
         try:
-            self.validate_attributes_name()
-            for attr in self.target_attribute:
-                self.validate_non_optional_attribute_field(attr)
-                self.validate_attribute_value(attr)
+            self.plan.validate(self.current_attribute)
         except ValidationError as e:
             _logger.error(e.error_msg)
             return e.error_msg
@@ -0,0 +1,96 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from typing import Optional
+
+from common import LoggerFactory
+from fastapi import APIRouter
+from fastapi import Depends
+from fastapi_utils.cbv import cbv
+
+from ...models.base_models import EAPIResponseCode
+from ...models.cache_models import CacheInvalidateResponse
+from ...resources.dependencies import jwt_required
+from ...resources.error_handler import ECustomizedError
+from ...resources.error_handler import catch_internal
+from ...resources.error_handler import customized_error_template
+from ...resources.permission_cache import permission_cache
+from ...resources.template_cache import template_cache
+
+router = APIRouter()
+_API_TAG = 'V1 Cache'
+_API_NAMESPACE = 'api_cache'
+
+
+@cbv(router)
+class APICache:
+    current_identity: dict = Depends(jwt_required)
+
+    def __init__(self):
+        self._logger = LoggerFactory(_API_NAMESPACE).get_logger()
+
+    def _is_platform_admin(self):
+        return self.current_identity.get('role') == 'admin'
+
+    def _permission_denied(self):
+        api_response = CacheInvalidateResponse()
+        api_response.code = EAPIResponseCode.forbidden
+        api_response.error_msg = customized_error_template(ECustomizedError.PERMISSION_DENIED)
+        return api_response.json_response()
+
+    @router.delete(
+        '/cache/permissions',
+        tags=[_API_TAG],
+        response_model=CacheInvalidateResponse,
+        summary='Invalidate cached authorization decisions',
+    )
+    @catch_internal(_API_NAMESPACE)
+    async def invalidate_permissions(self):
+        """Drop cached authorization decisions, platform admin only."""
+        self._logger.info('API invalidate_permissions'.center(80, '-'))
+        try:
+            _ = self.current_identity['username']
+        except (AttributeError, TypeError):
+            return self.current_identity
+        if not self._is_platform_admin():
+            return self._permission_denied()
+        await permission_cache.invalidate()
+        api_response = CacheInvalidateResponse()
+        api_response.code = EAPIResponseCode.success
+        api_response.result = 'success'
+        return api_response.json_response()
+
+    @router.delete(
+        '/cache/templates',
+        tags=[_API_TAG],
+        response_model=CacheInvalidateResponse,
+        summary='Invalidate cached attribute templates',
+    )
+    @catch_internal(_API_NAMESPACE)
+    async def invalidate_templates(self, project_code: Optional[str] = None):
+        """Drop cached attribute templates of one or all projects, platform admin only."""
+        self._logger.info('API invalidate_templates'.center(80, '-'))
+        try:
+            _ = self.current_identity['username']
+        except (AttributeError, TypeError):
+            return self.current_identity
+        if not self._is_platform_admin():
+            return self._permission_denied()
+        await template_cache.invalidate(project_code)
+        api_response = CacheInvalidateResponse()
+        api_response.code = EAPIResponseCode.success
+        api_response.result = 'success'
+        return api_response.json_response()
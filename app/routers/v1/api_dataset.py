@@ -13,15 +13,22 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
+
 from common import LoggerFactory
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Query
+from fastapi.responses import StreamingResponse
 from fastapi_utils.cbv import cbv
 
+from app.config import ConfigClass
+from app.resources.concurrency import iter_pages
 from app.resources.helpers import get_dataset
 from app.resources.helpers import get_dataset_versions
 from app.resources.helpers import list_datasets
 
+from ...models.base_models import NDJSON_MEDIA_TYPE
 from ...models.base_models import EAPIResponseCode
 from ...models.dataset_models import DatasetDetailResponse
 from ...models.dataset_models import DatasetListResponse
@@ -42,12 +49,31 @@ class APIDataset:
     def __init__(self):
         self._logger = LoggerFactory(_API_NAMESPACE).get_logger()
 
+    async def _stream_all_datasets(self, username):
+        page_size = ConfigClass.LISTING_PAGE_SIZE
+        count = 0
+        try:
+            async for datasets in iter_pages(
+                lambda page: list_datasets(username, page, page_size),
+                page_size,
+                ConfigClass.LISTING_PREFETCH_PAGES,
+            ):
+                count += len(datasets)
+                yield '\n'.join(json.dumps(dataset) for dataset in datasets) + '\n'
+        except Exception as e:
+            self._logger.error(f'Error streaming datasets: {e}')
+            yield json.dumps({'status': 'error', 'error_msg': str(e)}) + '\n'
+        self._logger.info(f'Streamed {count} datasets')
+
     @router.get('/datasets', tags=[_API_TAG],
                 response_model=DatasetListResponse,
                 summary='Get dataset list that user have access to')
     @catch_internal(_API_NAMESPACE)
-    async def list_datasets(self, page=0, page_size=10):
-        """Get the dataset list that user have access to."""
+    async def list_datasets(self, page=0, page_size=10, fetch_all: bool = Query(False, alias='all')):
+        """Get the dataset list that user have access to.
+
+        With all=true every dataset is streamed as NDJSON, one record per line.
+        """
         self._logger.info('API list_datasets'.center(80, '-'))
         api_response = DatasetListResponse()
         try:
@@ -56,6 +82,11 @@ class APIDataset:
             return self.current_identity
         self._logger.info(
             f'User request with identity: {self.current_identity}')
+        if fetch_all:
+            return StreamingResponse(
+                self._stream_all_datasets(username),
+                media_type=NDJSON_MEDIA_TYPE,
+            )
         dataset_list = await list_datasets(username, page, page_size)
         self._logger.info(f'Getting user datasets: {dataset_list}')
         self._logger.info(f'Number of datasets: {len(dataset_list)}')
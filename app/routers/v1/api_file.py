@@ -13,14 +13,21 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
+
 from common import LoggerFactory
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Request
+from fastapi.responses import StreamingResponse
 from fastapi_utils.cbv import cbv
 
+from ...config import ConfigClass
+from ...models.base_models import NDJSON_MEDIA_TYPE
 from ...models.file_models import GetProjectFileListResponse
 from ...models.file_models import QueryDataInfo
 from ...models.file_models import QueryDataInfoResponse
+from ...resources.concurrency import gather_bounded
 from ...resources.dependencies import get_project_role
 from ...resources.dependencies import has_permission
 from ...resources.dependencies import jwt_required
@@ -30,6 +37,7 @@ from ...resources.error_handler import catch_internal
 from ...resources.error_handler import customized_error_template
 from ...resources.helpers import batch_query_node_by_geid
 from ...resources.helpers import get_zone
+from ...resources.helpers import iter_query_node_by_geid
 from ...resources.helpers import query_file_folder
 from ...resources.helpers import separate_rel_path
 
@@ -45,6 +53,69 @@ class APIFile:
     def __init__(self):
         self._logger = LoggerFactory(_API_NAMESPACE).get_logger()
 
+    async def _resolve_permissions(self, query_result, permissions, project_roles):
+        """Check every (project, zone) pair not seen yet once, concurrently."""
+        permission_keys = list({
+            (node.get('container_code'), node.get('zone'))
+            for node in query_result.values()
+        } - permissions.keys())
+        permission_results = await gather_bounded(
+            (
+                has_permission(self.current_identity, project_code, 'file', zone, 'view')
+                for project_code, zone in permission_keys
+            ),
+            ConfigClass.PERMISSION_CHECK_CONCURRENCY,
+        )
+        permissions.update(zip(permission_keys, permission_results))
+        for project_code, _ in permission_keys:
+            if project_code not in project_roles:
+                project_roles[project_code] = get_project_role(self.current_identity, project_code)
+
+    def _geid_status(self, global_entity_id, node, permissions, project_roles):
+        self._logger.info(f'Query geid: {global_entity_id}')
+        result = {}
+        if node is None:
+            status = customized_error_template(ECustomizedError.FILE_NOT_FOUND)
+            self._logger.info(f'status: {status}')
+        elif node.get('archived'):
+            status = customized_error_template(ECustomizedError.FILE_FOLDER_ONLY)
+            self._logger.info(f'status: {status}')
+        else:
+            self._logger.info(f'Query result: {node}')
+            project_code = node.get('container_code')
+            zone = node.get('zone')
+            name_folder = node.get('parent_path').split('/')[0]
+            project_role = project_roles[project_code]
+            if not permissions[(project_code, zone)]:
+                status = customized_error_template(ECustomizedError.PERMISSION_DENIED)
+            elif self.current_identity['username'] != name_folder and \
+                    project_role not in ['platform-admin', 'admin']:
+                status = customized_error_template(ECustomizedError.PERMISSION_DENIED)
+            else:
+                status = 'success'
+                result = node
+        return {'status': status, 'result': result, 'geid': global_entity_id}
+
+    async def _stream_geid_statuses(self, geid_list):
+        permissions = {}
+        project_roles = {}
+        try:
+            async for geid_chunk, query_result in iter_query_node_by_geid(geid_list):
+                await self._resolve_permissions(query_result, permissions, project_roles)
+                lines = [
+                    json.dumps(self._geid_status(
+                        global_entity_id,
+                        query_result.get(global_entity_id),
+                        permissions,
+                        project_roles,
+                    ))
+                    for global_entity_id in geid_chunk
+                ]
+                yield '\n'.join(lines) + '\n'
+        except Exception as e:
+            self._logger.error(f'Error streaming geid query: {e}')
+            yield json.dumps({'status': 'error', 'error_msg': str(e)}) + '\n'
+
     @router.post(
         '/query/geid',
         tags=[_API_TAG],
@@ -52,51 +123,44 @@ class APIFile:
         summary='Query file/folder information by geid',
     )
     @catch_internal(_API_NAMESPACE)
-    async def query_file_folders_by_geid(self, data: QueryDataInfo):
-        """Get file/folder information by geid."""
+    async def query_file_folders_by_geid(self, data: QueryDataInfo, request: Request):
+        """Get file/folder information by geid.
+
+        With Accept: application/x-ndjson one status record per distinct geid
+        is streamed as soon as its chunk is resolved.
+        """
         file_response = QueryDataInfoResponse()
         try:
-            user_name = self.current_identity['username']
+            _ = self.current_identity['username']
         except (AttributeError, TypeError):
             return self.current_identity
         geid_list = data.geid
         self._logger.info('API /query/geid'.center(80, '-'))
-        self._logger.info(f'Received information geid: {geid_list}')
+        self._logger.info(f'Received {len(geid_list)} geids')
         self._logger.info(f'User identity: {self.current_identity}')
-        response_list = []
-        located_geid, query_result = await batch_query_node_by_geid(geid_list)
-        for global_entity_id in geid_list:
-            self._logger.info(f'Query geid: {global_entity_id}')
-            result = {}
-            if global_entity_id not in located_geid:
-                status = customized_error_template(ECustomizedError.FILE_NOT_FOUND)
-                self._logger.info(f'status: {status}')
-            elif query_result[global_entity_id].get('archived'):
-                status = customized_error_template(ECustomizedError.FILE_FOLDER_ONLY)
-                self._logger.info(f'status: {status}')
-            else:
-                self._logger.info(f'Query result: {query_result[global_entity_id]}')
-                project_code = query_result[global_entity_id].get('container_code')
-                zone = query_result[global_entity_id].get('zone')
-                parent_path = query_result[global_entity_id].get('parent_path')
-                name_folder = parent_path.split('/')[0]
-                permission = await has_permission(
-                    self.current_identity,
-                    project_code,
-                    'file',
-                    zone,
-                    'view',
-                )
-                if not permission:
-                    status = customized_error_template(ECustomizedError.PERMISSION_DENIED)
-                project_role = get_project_role(self.current_identity, project_code)
-                if user_name != name_folder and project_role not in ['platform-admin', 'admin']:
-                    status = customized_error_template(ECustomizedError.PERMISSION_DENIED)
-                else:
-                    status = 'success'
-                    result = query_result[global_entity_id]
-            response_list.append({'status': status, 'result': result, 'geid': global_entity_id})
-        self._logger.info(f'Query file/folder result: {response_list}')
+        if len(geid_list) > ConfigClass.QUERY_GEID_MAX:
+            file_response.code = EAPIResponseCode.bad_request
+            file_response.error_msg = f'Too many geids, at most {ConfigClass.QUERY_GEID_MAX} per query'
+            return file_response.json_response()
+        if NDJSON_MEDIA_TYPE in request.headers.get('accept', ''):
+            return StreamingResponse(
+                self._stream_geid_statuses(geid_list),
+                media_type=NDJSON_MEDIA_TYPE,
+            )
+        permissions = {}
+        project_roles = {}
+        _, query_result = await batch_query_node_by_geid(geid_list)
+        await self._resolve_permissions(query_result, permissions, project_roles)
+        response_list = [
+            self._geid_status(
+                global_entity_id,
+                query_result.get(global_entity_id),
+                permissions,
+                project_roles,
+            )
+            for global_entity_id in geid_list
+        ]
+        self._logger.info(f'Query file/folder result count: {len(response_list)}')
         file_response.result = response_list
         file_response.code = EAPIResponseCode.success
         return file_response.json_response()
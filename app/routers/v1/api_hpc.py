@@ -13,15 +13,24 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
+
 from common import LoggerFactory
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from fastapi_utils.cbv import cbv
 
+from ...config import ConfigClass
+from ...models.base_models import SSE_MEDIA_TYPE
 from ...models.error_model import HPCError
 from ...models.hpc_models import HPCAuthPost
 from ...models.hpc_models import HPCAuthResponse
 from ...models.hpc_models import HPCJobInfoResponse
 from ...models.hpc_models import HPCJobResponse
+from ...models.hpc_models import HPCJobsStatusPost
+from ...models.hpc_models import HPCJobsStatusResponse
+from ...models.hpc_models import HPCJobsSubmitPost
+from ...models.hpc_models import HPCJobsSubmitResponse
 from ...models.hpc_models import HPCJobSubmitPost
 from ...models.hpc_models import HPCNodeInfoResponse
 from ...models.hpc_models import HPCNodesResponse
@@ -30,12 +39,12 @@ from ...models.hpc_models import HPCPartitonsResponse
 from ...resources.error_handler import EAPIResponseCode
 from ...resources.error_handler import catch_internal
 from ...resources.hpc import get_hpc_job_info
+from ...resources.hpc import get_hpc_jobs_status
 from ...resources.hpc import get_hpc_jwt_token
-from ...resources.hpc import get_hpc_node_by_name
-from ...resources.hpc import get_hpc_nodes
-from ...resources.hpc import get_hpc_partition_name
-from ...resources.hpc import get_hpc_partitions
 from ...resources.hpc import submit_hpc_job
+from ...resources.hpc import submit_hpc_jobs
+from ...resources.hpc_cluster_cache import hpc_cluster_cache
+from ...resources.hpc_job_watch import hpc_job_watch
 
 router = APIRouter()
 _API_TAG = 'V1 HPC'
@@ -115,6 +124,34 @@ class APIProject:
         api_response.code = code
         return api_response.json_response()
 
+    @router.post(
+        '/hpc/jobs',
+        tags=[_API_TAG],
+        response_model=HPCJobsSubmitResponse,
+        summary='HPC batch job submission')
+    @catch_internal(_API_NAMESPACE)
+    async def hpc_submit_jobs(self, request_payload: HPCJobsSubmitPost):
+        """Submit many jobs to one hpc host, results are returned in order."""
+        self._logger.info('API hpc_jobs'.center(80, '-'))
+        api_response = HPCJobsSubmitResponse()
+        jobs = request_payload.jobs
+        if len(jobs) > ConfigClass.HPC_JOB_SUBMIT_MAX:
+            api_response.code = EAPIResponseCode.bad_request
+            api_response.error_msg = f'Too many jobs, at most {ConfigClass.HPC_JOB_SUBMIT_MAX} per request'
+            return api_response.json_response()
+        try:
+            api_response.result = await submit_hpc_jobs(
+                request_payload.host,
+                request_payload.username,
+                request_payload.token,
+                jobs)
+            api_response.code = EAPIResponseCode.success
+        except HPCError as e:
+            self._logger.info(f'ERROR SUBMITTING HPC JOBS: {e}')
+            api_response.code = e.code
+            api_response.error_msg = e.error_msg
+        return api_response.json_response()
+
     @router.get('/hpc/job/{job_id}', tags=[_API_TAG],
                 response_model=HPCJobInfoResponse,
                 summary='Get HPC job information')
@@ -149,6 +186,62 @@ class APIProject:
         api_response.code = code
         return api_response.json_response()
 
+    @router.post('/hpc/jobs/status', tags=[_API_TAG],
+                 response_model=HPCJobsStatusResponse,
+                 summary='Get information of many HPC jobs')
+    @catch_internal(_API_NAMESPACE)
+    async def hpc_get_jobs_status(self, request_payload: HPCJobsStatusPost):
+        """Get HPC job information for a list of job ids on one host."""
+        self._logger.info('API hpc_get_jobs_status'.center(80, '-'))
+        api_response = HPCJobsStatusResponse()
+        job_ids = request_payload.job_ids
+        if len(job_ids) > ConfigClass.HPC_JOB_STATUS_MAX:
+            api_response.code = EAPIResponseCode.bad_request
+            api_response.error_msg = f'Too many job ids, at most {ConfigClass.HPC_JOB_STATUS_MAX} per request'
+            return api_response.json_response()
+        try:
+            api_response.result = await get_hpc_jobs_status(
+                job_ids,
+                request_payload.host,
+                request_payload.username,
+                request_payload.token)
+            api_response.code = EAPIResponseCode.success
+        except HPCError as e:
+            self._logger.info(f'ERROR GETTING HPC jobs: {e}')
+            api_response.code = e.code
+            api_response.error_msg = e.error_msg
+        return api_response.json_response()
+
+    async def _stream_job_events(self, job_id, host, username, token):
+        async for event in hpc_job_watch.watch(job_id, host, username, token):
+            if event is None:
+                yield ': keepalive\n\n'
+            else:
+                name, data = event
+                yield f'event: {name}\ndata: {json.dumps(data)}\n\n'
+
+    @router.get('/hpc/job/{job_id}/watch', tags=[_API_TAG],
+                response_model=HPCJobInfoResponse,
+                summary='Stream HPC job state changes')
+    @catch_internal(_API_NAMESPACE)
+    async def hpc_watch_job(self, job_id, host, username, token):
+        """Stream HPC job information as server-sent events until the job finishes.
+
+        Every change is sent as a 'state' event, a failure to read the job as
+        an 'error' event. Watchers of the same job share one upstream poller.
+        """
+        self._logger.info('API hpc_watch_job'.center(80, '-'))
+        if len(host.split('://')) < 2:
+            api_response = HPCJobInfoResponse()
+            api_response.code = EAPIResponseCode.bad_request
+            api_response.error_msg = 'HPC protocal required'
+            return api_response.json_response()
+        return StreamingResponse(
+            self._stream_job_events(job_id, host, username, token),
+            media_type=SSE_MEDIA_TYPE,
+            headers={'Cache-Control': 'no-cache'},
+        )
+
     @router.get('/hpc/nodes', tags=[_API_TAG],
                 response_model=HPCNodesResponse,
                 summary='Get HPC nodes')
@@ -159,7 +252,7 @@ class APIProject:
         api_response = HPCNodesResponse()
         result = {}
         try:
-            information = await get_hpc_nodes(host, username, token)
+            information = await hpc_cluster_cache.nodes(host, username, token)
             if information:
                 error = ''
                 code = EAPIResponseCode.success
@@ -193,7 +286,7 @@ class APIProject:
         api_response = HPCNodeInfoResponse()
         result = {}
         try:
-            information = await get_hpc_node_by_name(
+            information = await hpc_cluster_cache.node(
                 host, username, token, node_name)
             if information:
                 error = ''
@@ -229,7 +322,7 @@ class APIProject:
         api_response = HPCPartitonsResponse()
         result = {}
         try:
-            information = await get_hpc_partitions(host, username, token)
+            information = await hpc_cluster_cache.partitions(host, username, token)
             if information:
                 error = ''
                 code = EAPIResponseCode.success
@@ -270,7 +363,7 @@ class APIProject:
         api_response = HPCPartitionInfoResponse()
         result = {}
         try:
-            information = await get_hpc_partition_name(
+            information = await hpc_cluster_cache.partition(
                 host, username, token, partition_name)
             if information:
                 error = ''
@@ -13,25 +13,60 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import httpx
+import json
+
 from common import LoggerFactory
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Request
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBasicCredentials
 from fastapi.security import HTTPBearer
 from fastapi_utils.cbv import cbv
 
 from ...config import ConfigClass
+from ...models.base_models import NDJSON_MEDIA_TYPE
+from ...models.base_models import EAPIResponseCode
 from ...models.kg_models import KGImportPost
 from ...models.kg_models import KGResponseModel
+from ...resources.concurrency import gather_bounded
+from ...resources.concurrency import iter_bounded
 from ...resources.dependencies import jwt_required
 from ...resources.error_handler import catch_internal
+from ...resources.http_clients import get_client
 
 router = APIRouter()
 _API_TAG = 'V1 KG'
 _API_NAMESPACE = 'api_kg'
 
 
+def merge_kg_results(contents) -> KGResponseModel:
+    """Merge the processing and ignored resources of chunk responses.
+
+    The code is the one of the first failed chunk and the error messages of
+    all failed chunks are joined.
+    """
+    api_response = KGResponseModel()
+    merged = {'processing': {}, 'ignored': {}}
+    failed = []
+    for content in contents:
+        result = content.get('result') or {}
+        for key, resources in merged.items():
+            resources.update(result.get(key) or {})
+        if content.get('code') != EAPIResponseCode.success.value:
+            failed.append(content)
+    api_response.result = merged
+    if failed:
+        try:
+            api_response.code = EAPIResponseCode(failed[0].get('code'))
+        except ValueError:
+            api_response.code = EAPIResponseCode.internal_error
+        api_response.error_msg = '; '.join(str(content.get('error_msg')) for content in failed)
+    else:
+        api_response.code = EAPIResponseCode.success
+    return api_response
+
+
 @cbv(router)
 class APIProject:
     current_identity: dict = Depends(jwt_required)
@@ -40,6 +75,25 @@ class APIProject:
     def __init__(self):
         self._logger = LoggerFactory(_API_NAMESPACE).get_logger()
 
+    async def _post_resources(self, url, headers, resources):
+        client = get_client('KG_SERVICE')
+        response = await client.post(url, json={'data': resources}, headers=headers)
+        self._logger.info(f'Response: {response.text}')
+        return response.json()
+
+    async def _post_chunk(self, url, headers, index, chunk):
+        """Post one chunk, turning a failure into an error result so the other chunks still count."""
+        try:
+            content = await self._post_resources(url, headers, chunk)
+        except Exception as e:
+            self._logger.error(f'Error importing kg chunk {index}: {e}')
+            content = {'code': EAPIResponseCode.internal_error.value, 'error_msg': str(e), 'result': {}}
+        return index, content
+
+    async def _stream_chunk_results(self, chunk_posts, total):
+        async for index, content in iter_bounded(chunk_posts, ConfigClass.KG_IMPORT_CONCURRENCY):
+            yield json.dumps({'chunk': index, 'total': total, **content}) + '\n'
+
     @router.post(
         '/kg/resources',
         tags=[_API_TAG],
@@ -49,22 +103,33 @@ class APIProject:
     async def kg_import(
         self,
         request_payload: KGImportPost,
+        request: Request,
         credentials: HTTPBasicCredentials = Depends(security)
     ):
-        """Import kg_resource."""
+        """Import kg_resource.
+
+        More than KG_IMPORT_CHUNK_SIZE resources are posted in chunks, at most
+        KG_IMPORT_CONCURRENCY at once, and the results are merged. With
+        Accept: application/x-ndjson the result of each chunk is streamed instead.
+        """
         self._logger.info('API KG IMPORT'.center(80, '-'))
         url = ConfigClass.KG_SERVICE + '/v1/resources'
         self._logger.info(f'Requesting url: {url}')
-        payload = {
-            'data': request_payload.data
-        }
         token = credentials.credentials
         headers = {'Authorization': 'Bearer ' + token}
-        self._logger.info(f'Request payload: {payload}')
         self._logger.info(f'Request headers: {headers}')
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers)
-        self._logger.info(f'Response: {response.text}')
-        content = response.json()
-        self._logger.info(f'Response content: {content}')
-        return content
+        resources = list(request_payload.data.items())
+        chunk_size = max(ConfigClass.KG_IMPORT_CHUNK_SIZE, 1)
+        chunks = [dict(resources[i:i + chunk_size]) for i in range(0, len(resources), chunk_size)] or [{}]
+        self._logger.info(f'Importing {len(resources)} resources in {len(chunks)} chunks')
+        stream = NDJSON_MEDIA_TYPE in request.headers.get('accept', '')
+        chunk_posts = (self._post_chunk(url, headers, index, chunk) for index, chunk in enumerate(chunks))
+        if stream:
+            return StreamingResponse(
+                self._stream_chunk_results(chunk_posts, len(chunks)),
+                media_type=NDJSON_MEDIA_TYPE,
+            )
+        contents = [
+            content for _, content in await gather_bounded(chunk_posts, ConfigClass.KG_IMPORT_CONCURRENCY)
+        ]
+        return merge_kg_results(contents).json_response()
@@ -13,7 +13,6 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-import httpx
 from common import LoggerFactory
 from fastapi import APIRouter
 from fastapi import Depends
@@ -24,6 +23,7 @@ from ...config import ConfigClass
 from ...models.lineage_models import LineageCreatePost
 from ...resources.dependencies import jwt_required
 from ...resources.error_handler import catch_internal
+from ...resources.http_clients import get_client
 
 router = APIRouter()
 
@@ -50,12 +50,12 @@ class APILineage:
         url = ConfigClass.AUDIT_TRAIL_SERVICE + '/v1/lineage/'
         self._logger.info(f'url: {url}')
         self._logger.info(f'payload: {proxy_payload}')
-        async with httpx.AsyncClient() as client:
-            fw_response = await client.post(
-                url,
-                json=proxy_payload,
-                timeout=300,
-                follow_redirects=True)
+        client = get_client('AUDIT_TRAIL_SERVICE')
+        fw_response = await client.post(
+            url,
+            json=proxy_payload,
+            timeout=300,
+            follow_redirects=True)
         return JSONResponse(
             content=fw_response.json(),
             status_code=fw_response.status_code)
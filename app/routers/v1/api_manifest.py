@@ -13,17 +13,28 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
+
 from common import LoggerFactory
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Request
+from fastapi.responses import StreamingResponse
 from fastapi_utils.cbv import cbv
 
 from app.config import ConfigClass
 
+from ...models.base_models import NDJSON_MEDIA_TYPE
+from ...models.error_model import ValidationError
 from ...models.manifest_models import ManifestAttachPost
 from ...models.manifest_models import ManifestAttachResponse
+from ...models.manifest_models import ManifestBatchAttachPost
+from ...models.manifest_models import ManifestBatchAttachResponse
 from ...models.manifest_models import ManifestExportResponse
 from ...models.manifest_models import ManifestListResponse
+from ...resources.concurrency import fan_out
+from ...resources.concurrency import gather_bounded
+from ...resources.concurrency import iter_bounded
 from ...resources.dependencies import has_permission
 from ...resources.dependencies import jwt_required
 from ...resources.error_handler import EAPIResponseCode
@@ -36,6 +47,7 @@ from ...resources.helpers import get_zone
 from ...resources.helpers import query_file_folder
 from ...resources.helpers import separate_rel_path
 from ...resources.validation_service import ManifestValidator
+from ...resources.validation_service import get_validation_plan
 
 router = APIRouter()
 
@@ -48,6 +60,21 @@ class APIManifest:
     def __init__(self):
         self._logger = LoggerFactory(self._API_NAMESPACE).get_logger()
 
+    async def _query_file_node(self, project_code, zone, file_path):
+        parent_path, file_name = separate_rel_path(file_path)
+        file_info = {
+            'container_code': project_code,
+            'container_type': 'project',
+            'parent_path': parent_path.replace('/', '.'),
+            'recursive': False,
+            'zone': get_zone(zone),
+            'archived': False,
+            'name': file_name,
+        }
+        file_response = await query_file_folder(file_info)
+        self._logger.info(f'Query result: {file_response.text}')
+        return file_response.json().get('result')
+
     @router.get(
         '/manifest',
         tags=[_API_TAG],
@@ -100,6 +127,20 @@ class APIManifest:
             api_response.error_msg = str(e)
             return api_response.json_response()
 
+    async def _attach_permission(self, current_identity, project_code, zone):
+        """Return the attach permission and the key missing from the identity, if any."""
+        try:
+            permission = await has_permission(
+                current_identity,
+                project_code,
+                'file_attribute_template',
+                zone,
+                'attach',
+            )
+            return permission, None
+        except KeyError as e:
+            return False, e
+
     @router.post(
         '/manifest/attach',
         tags=[_API_TAG],
@@ -121,39 +162,33 @@ class APIManifest:
             return current_identity
         self._logger.info('API attach_manifest'.center(80, '-'))
         self._logger.info(f'User request with identity: {current_identity}')
-        try:
-            permission = await has_permission(
-                current_identity,
-                project_code,
-                'file_attribute_template',
-                zone,
-                'attach',
-            )
-            if not permission:
-                api_response.error_msg = 'Permission denied'
-                api_response.code = EAPIResponseCode.forbidden
-                return api_response.json_response()
-        except KeyError as e:
-            self._logger.error(f'Missing information error: {str(e)}')
+        # permission, file node and template do not depend on each other
+        results = await fan_out(
+            {
+                'permission': self._attach_permission(current_identity, project_code, zone),
+                'file_node': self._query_file_node(project_code, zone, file_path),
+                'template': get_attribute_templates(project_code, manifest_name),
+            },
+            abort=lambda done: 'permission' in done and (
+                not done['permission'][0] or ('file_node' in done and not done['file_node'])
+            ),
+            guard='permission',
+        )
+        permission, missing = results['permission']
+        if missing is not None:
+            self._logger.error(f'Missing information error: {str(missing)}')
             api_response.error_msg = customized_error_template(
                 ECustomizedError.MISSING_INFO
-            ) % str(e)
+            ) % str(missing)
             api_response.code = EAPIResponseCode.bad_request
-            api_response.result = str(e)
+            api_response.result = str(missing)
             return api_response.json_response()
-        parent_path, file_name = separate_rel_path(file_path)
-        file_info = {
-            'container_code': project_code,
-            'container_type': 'project',
-            'parent_path': parent_path.replace('/', '.'),
-            'recursive': False,
-            'zone': get_zone(zone),
-            'archived': False,
-            'name': file_name,
-        }
-        file_response = await query_file_folder(file_info)
-        self._logger.info(f'Query result: {file_response.text}')
-        file_node = file_response.json().get('result')
+        if not permission:
+            api_response.error_msg = 'Permission denied'
+            api_response.code = EAPIResponseCode.forbidden
+            return api_response.json_response()
+        file_node = results.get('file_node')
+        file_name = separate_rel_path(file_path)[1]
         if not file_node:
             api_response.error_msg = customized_error_template(ECustomizedError.FILE_NOT_FOUND)
             api_response.code = EAPIResponseCode.not_found
@@ -164,13 +199,13 @@ class APIManifest:
         self._logger.info(f'Globale entity id for {file_name}: {global_entity_id}')
         self._logger.info(f'File {file_name} file_type by {file_type}')
         annotation_func = getattr(Annotations, f'attach_manifest_to_{file_type}')
-        filter_template_res = await get_attribute_templates(project_code, manifest_name)
+        filter_template_res = results['template']
         self._logger.info(f'filter_template_res: {filter_template_res}')
         target_manifest = filter_template_res.get('result')
         if target_manifest:
             target_attribute = target_manifest[0].get('attributes')
             self._logger.info(f'target_attribute: {target_attribute}')
-            validator = ManifestValidator(attributes, target_attribute)
+            validator = ManifestValidator(attributes, target_attribute, target_manifest[0].get('id'))
             attribute_validation_error_msg = await validator.has_valid_attributes()
             if attribute_validation_error_msg:
                 self._logger.error(f'attribute_validation_error_msg: {attribute_validation_error_msg}')
@@ -204,6 +239,119 @@ class APIManifest:
             api_response.code = EAPIResponseCode.success
             return api_response.json_response()
 
+    async def _attach_item(self, project_code, zone, manifest_id, item):
+        """Resolve one file and attach the manifest attributes to it."""
+        result = {'file_name': item.file_name, 'code': EAPIResponseCode.success.value, 'error_msg': '', 'result': None}
+        try:
+            file_node = await self._query_file_node(project_code, zone, item.file_name)
+            if not file_node:
+                result['code'] = EAPIResponseCode.not_found.value
+                result['error_msg'] = customized_error_template(ECustomizedError.FILE_NOT_FOUND)
+                return result
+            annotation_func = getattr(Annotations, f'attach_manifest_to_{file_node[0].get("type")}')
+            response = await annotation_func({
+                'global_entity_id': file_node[0].get('id'),
+                'manifest_id': manifest_id,
+                'attributes': item.attributes,
+            })
+            if not response:
+                result['code'] = EAPIResponseCode.not_found.value
+                result['error_msg'] = customized_error_template(ECustomizedError.FILE_NOT_FOUND)
+            else:
+                result['result'] = response
+        except Exception as e:
+            self._logger.error(f'Error attaching manifest to {item.file_name}: {e}')
+            result['code'] = EAPIResponseCode.internal_error.value
+            result['error_msg'] = str(e)
+        return result
+
+    def _validate_items(self, plan, items):
+        """Return a result slot per item, filled for invalid items, and the indexes of the valid ones."""
+        results = [None] * len(items)
+        valid_indexes = []
+        for index, item in enumerate(items):
+            try:
+                plan.validate(item.attributes)
+                valid_indexes.append(index)
+            except ValidationError as e:
+                results[index] = {
+                    'file_name': item.file_name,
+                    'code': EAPIResponseCode.bad_request.value,
+                    'error_msg': e.error_msg,
+                    'result': None,
+                }
+        return results, valid_indexes
+
+    async def _stream_attach_results(self, invalid_results, attach_items):
+        for result in invalid_results:
+            yield json.dumps(result) + '\n'
+        async for result in iter_bounded(attach_items, ConfigClass.MANIFEST_ATTACH_CONCURRENCY):
+            yield json.dumps(result) + '\n'
+
+    @router.post(
+        '/manifest/attach/batch',
+        tags=[_API_TAG],
+        response_model=ManifestBatchAttachResponse,
+        summary='Attach manifest to many files',
+    )
+    @catch_internal(_API_NAMESPACE)
+    async def attach_manifest_batch(
+        self,
+        data: ManifestBatchAttachPost,
+        request: Request,
+        current_identity: dict = Depends(jwt_required)
+    ):
+        """Validate every item up front, then attach the manifest to the valid files concurrently.
+
+        With Accept: application/x-ndjson one result record per file is streamed as it finishes.
+        """
+        api_response = ManifestBatchAttachResponse()
+        try:
+            _ = current_identity['username']
+        except (AttributeError, TypeError):
+            return current_identity
+        self._logger.info('API attach_manifest_batch'.center(80, '-'))
+        self._logger.info(f'Received {len(data.items)} items for {data.project_code}/{data.manifest_name}')
+        if len(data.items) > ConfigClass.MANIFEST_ATTACH_MAX:
+            api_response.code = EAPIResponseCode.bad_request
+            api_response.error_msg = f'Too many items, at most {ConfigClass.MANIFEST_ATTACH_MAX} per request'
+            return api_response.json_response()
+        permission = await has_permission(
+            current_identity,
+            data.project_code,
+            'file_attribute_template',
+            data.zone,
+            'attach',
+        )
+        if not permission:
+            api_response.error_msg = 'Permission denied'
+            api_response.code = EAPIResponseCode.forbidden
+            return api_response.json_response()
+        filter_template_res = await get_attribute_templates(data.project_code, data.manifest_name)
+        target_manifest = filter_template_res.get('result') if filter_template_res else None
+        if not target_manifest:
+            api_response.error_msg = f'Manifest Not Exist {data.manifest_name}'
+            api_response.code = EAPIResponseCode.bad_request
+            return api_response.json_response()
+        manifest_id = target_manifest[0].get('id')
+        plan = get_validation_plan(target_manifest[0].get('attributes'), manifest_id)
+        results, valid_indexes = self._validate_items(plan, data.items)
+        self._logger.info(f'{len(valid_indexes)} valid items, {len(data.items) - len(valid_indexes)} invalid items')
+        attach_items = (
+            self._attach_item(data.project_code, data.zone, manifest_id, data.items[index]) for index in valid_indexes
+        )
+        if NDJSON_MEDIA_TYPE in request.headers.get('accept', ''):
+            return StreamingResponse(
+                self._stream_attach_results([result for result in results if result], attach_items),
+                media_type=NDJSON_MEDIA_TYPE,
+            )
+        attach_results = await gather_bounded(attach_items, ConfigClass.MANIFEST_ATTACH_CONCURRENCY)
+        for index, result in zip(valid_indexes, attach_results):
+            results[index] = result
+        api_response.result = results
+        api_response.code = EAPIResponseCode.success
+        return api_response.json_response()
+
     @router.get(
         '/manifest/export',
         tags=[_API_TAG],
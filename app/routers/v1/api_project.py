@@ -13,17 +13,26 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
+
 from common import LoggerFactory
 from fastapi import APIRouter
 from fastapi import Depends
+from fastapi import Query
 from fastapi import Request
+from fastapi.responses import StreamingResponse
 from fastapi_utils.cbv import cbv
 
+from ...config import ConfigClass
+from ...models.base_models import NDJSON_MEDIA_TYPE
 from ...models.base_models import EAPIResponseCode
 from ...models.project_models import GetProjectFolderResponse
 from ...models.project_models import POSTProjectFile
 from ...models.project_models import POSTProjectFileResponse
 from ...models.project_models import ProjectListResponse
+from ...resources.concurrency import any_bounded
+from ...resources.concurrency import fan_out
+from ...resources.concurrency import iter_pages
 from ...resources.dependencies import get_project_role
 from ...resources.dependencies import has_permission
 from ...resources.dependencies import jwt_required
@@ -48,6 +57,22 @@ class APIProject:
     def __init__(self):
         self._logger = LoggerFactory(_API_NAMESPACE).get_logger()
 
+    async def _stream_all_projects(self, order, order_by):
+        page_size = ConfigClass.LISTING_PAGE_SIZE
+        count = 0
+        try:
+            async for projects in iter_pages(
+                lambda page: get_user_projects(self.current_identity, page, page_size, order, order_by),
+                page_size,
+                ConfigClass.LISTING_PREFETCH_PAGES,
+            ):
+                count += len(projects)
+                yield '\n'.join(json.dumps(project) for project in projects) + '\n'
+        except Exception as e:
+            self._logger.error(f'Error streaming projects: {e}')
+            yield json.dumps({'status': 'error', 'error_msg': str(e)}) + '\n'
+        self._logger.info(f'Streamed {count} projects')
+
     @router.get(
         '/projects',
         tags=[_API_TAG],
@@ -55,8 +80,18 @@ class APIProject:
         summary='Get project list that user have access to',
     )
     @catch_internal(_API_NAMESPACE)
-    async def list_project(self, page=0, page_size=10, order='created_at', order_by='desc'):
-        """Get the project list that user have access to."""
+    async def list_project(
+        self,
+        page=0,
+        page_size=10,
+        order='created_at',
+        order_by='desc',
+        fetch_all: bool = Query(False, alias='all'),
+    ):
+        """Get the project list that user have access to.
+
+        With all=true every project is streamed as NDJSON, one record per line.
+        """
         self._logger.info('API list_project'.center(80, '-'))
         api_response = ProjectListResponse()
         try:
@@ -66,6 +101,11 @@ class APIProject:
         self._logger.info(
             f'User request with identity: {self.current_identity}'
         )
+        if fetch_all:
+            return StreamingResponse(
+                self._stream_all_projects(order, order_by),
+                media_type=NDJSON_MEDIA_TYPE,
+            )
         project_list = await get_user_projects(self.current_identity, page, page_size, order, order_by)
         self._logger.info(f'Getting user projects: {project_list}')
         self._logger.info(f'Number of projects: {len(project_list)}')
@@ -73,6 +113,46 @@ class APIProject:
         api_response.code = EAPIResponseCode.success
         return api_response.json_response()
 
+    async def _item_exists(self, query, names):
+        response = await query_file_folder(query)
+        file_result = response.json()
+        if file_result.get('code') != 200 or not file_result.get('result'):
+            return False
+        if len(names) == 1:
+            return True
+        return any(item.get('name') in names for item in file_result['result'])
+
+    async def _has_existing_item(self, project_code, data):
+        """Check upload conflicts concurrently, grouped by parent path."""
+        query_type = 'file' if data.job_type == 'AS_FILE' else 'folder'
+        names_by_parent = {}
+        for file in data.data:
+            names_by_parent.setdefault(
+                file.get('resumable_relative_path'), []
+            ).append(file.get('resumable_filename'))
+        checks = []
+        for parent_path, names in names_by_parent.items():
+            if ConfigClass.METADATA_MULTI_NAME_QUERY:
+                name_groups = [names]
+            else:
+                name_groups = [[name] for name in names]
+            for name_group in name_groups:
+                query = {
+                    'container_code': project_code,
+                    'container_type': 'project',
+                    'parent_path': parent_path,
+                    'recursive': False,
+                    'zone': get_zone(data.zone),
+                    'archived': False,
+                    'type': query_type,
+                    'name': name_group if len(name_group) > 1 else name_group[0],
+                }
+                checks.append(self._item_exists(query, set(name_group)))
+        self._logger.info(
+            f'Checking {len(data.data)} items in {len(names_by_parent)} folders with {len(checks)} queries'
+        )
+        return await any_bounded(checks, ConfigClass.PREUPLOAD_CHECK_CONCURRENCY)
+
     @router.post(
         '/project/{project_code}/files',
         response_model=POSTProjectFileResponse,
@@ -110,25 +190,11 @@ class APIProject:
             api_response.result = val_result
             return api_response.json_response()
         try:
-            for file in data.data:
-                query_type = 'file' if data.job_type == 'AS_FILE' else 'folder'
-                query = {
-                    'container_code': project_code,
-                    'container_type': 'project',
-                    'parent_path': file.get('resumable_relative_path'),
-                    'recursive': False,
-                    'zone': get_zone(data.zone),
-                    'archived': False,
-                    'type': query_type,
-                    'name': file.get('resumable_filename'),
-                }
-                response = await query_file_folder(query)
-                file_result = response.json()
-                if file_result.get('code') == 200 and file_result.get('result'):
-                    api_response.error_msg = 'File with that name already exists'
-                    api_response.code = EAPIResponseCode.conflict
-                    api_response.result = data
-                    return api_response.json_response()
+            if await self._has_existing_item(project_code, data):
+                api_response.error_msg = 'File with that name already exists'
+                api_response.code = EAPIResponseCode.conflict
+                api_response.result = data
+                return api_response.json_response()
             self._logger.info('Tansfering to pre upload')
             result = await transfer_to_pre(data, project_code, request.headers)
             self._logger.info(result.text)
@@ -164,15 +230,6 @@ class APIProject:
         self._logger.info(f'User request identity: {self.current_identity}')
         zone_type = get_zone(zone.lower())
         error_msg = ''
-        permission = await has_permission(
-            self.current_identity, project_code, 'file', zone.lower(), 'view'
-        )
-        if not permission:
-            api_response.error_msg = customized_error_template(
-                ECustomizedError.PERMISSION_DENIED
-            )
-            api_response.code = EAPIResponseCode.forbidden
-            return api_response.json_response()
         project_role = get_project_role(self.current_identity, project_code)
         name_folder = path.split('/')[0]
         # verify the name folder access permission
@@ -199,7 +256,24 @@ class APIProject:
         if item_type:
             folder_check_event['type'] = item_type
         self._logger.info(f'Folder check event: {folder_check_event}')
-        folder_response = await query_file_folder(folder_check_event)
+        # the folder query does not depend on the permission check
+        results = await fan_out(
+            {
+                'permission': has_permission(
+                    self.current_identity, project_code, 'file', zone.lower(), 'view'
+                ),
+                'folder': query_file_folder(folder_check_event),
+            },
+            abort=lambda done: not done.get('permission', True),
+            guard='permission',
+        )
+        if not results['permission']:
+            api_response.error_msg = customized_error_template(
+                ECustomizedError.PERMISSION_DENIED
+            )
+            api_response.code = EAPIResponseCode.forbidden
+            return api_response.json_response()
+        folder_response = results['folder']
         self._logger.info(f'Folder check response: {folder_response.text}')
         response = folder_response.json()
         if response.get('code') != 200:
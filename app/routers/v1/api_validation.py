@@ -20,12 +20,16 @@ from fastapi_utils.cbv import cbv
 
 from app.config import ConfigClass
 from app.models.error_model import InvalidEncryptionError
+from app.models.error_model import ValidationError
 from app.resources.helpers import get_attribute_templates
 
 from ...models.validation_models import EnvValidatePost
 from ...models.validation_models import EnvValidateResponse
+from ...models.validation_models import ManifestsValidatePost
+from ...models.validation_models import ManifestsValidateResponse
 from ...models.validation_models import ManifestValidatePost
 from ...models.validation_models import ManifestValidateResponse
+from ...resources.concurrency import gather_bounded
 from ...resources.dependencies import has_permission
 from ...resources.dependencies import jwt_required
 from ...resources.error_handler import EAPIResponseCode
@@ -34,6 +38,7 @@ from ...resources.error_handler import catch_internal
 from ...resources.error_handler import customized_error_template
 from ...resources.validation_service import ManifestValidator
 from ...resources.validation_service import decryption
+from ...resources.validation_service import get_validation_plan
 
 router = APIRouter()
 
@@ -89,7 +94,7 @@ class APIValidation:
             target_attribute = manifest_list[0].get('attributes')
             self._logger.info(f'attributes: {attributes}')
             self._logger.info(f'target_attribute: {target_attribute}')
-            validator = ManifestValidator(attributes, target_attribute)
+            validator = ManifestValidator(attributes, target_attribute, manifest_list[0].get('id'))
             attribute_validation_error_msg = await validator.has_valid_attributes()
             if attribute_validation_error_msg:
                 self._logger.error(f'attribute_validation_error_msg: {attribute_validation_error_msg}')
@@ -104,6 +109,109 @@ class APIValidation:
             self._logger.error(f'Error validate_manifest: {e}')
             raise e
 
+    async def _get_group_plan(self, current_identity, project_code, manifest_name):
+        """Return the validation plan of a group, or the error shared by its manifests."""
+        permission = await has_permission(
+            current_identity,
+            project_code,
+            'file_attribute_template',
+            ConfigClass.GREEN_ZONE_LABEL.lower(),
+            'view',
+        )
+        if not permission:
+            return None, (EAPIResponseCode.forbidden, 'Permission denied')
+        response = await get_attribute_templates(project_code, manifest_name)
+        manifest_list = response.get('result') if response else None
+        if not manifest_list:
+            error_msg = customized_error_template(ECustomizedError.MANIFEST_NOT_FOUND) % manifest_name
+            return None, (EAPIResponseCode.not_found, error_msg)
+        return get_validation_plan(manifest_list[0].get('attributes'), manifest_list[0].get('id')), None
+
+    def _validate_attributes(self, plan, attributes):
+        if not isinstance(attributes, dict):
+            return EAPIResponseCode.bad_request, 'attributes must be an object'
+        try:
+            plan.validate(attributes)
+            return EAPIResponseCode.success, ''
+        except ValidationError as e:
+            return EAPIResponseCode.bad_request, e.error_msg
+        except Exception as e:
+            self._logger.error(f'Error validating attributes: {e}')
+            return EAPIResponseCode.internal_error, str(e)
+
+    async def _validate_manifest_group(self, current_identity, project_code, manifest_name, manifests):
+        """Resolve permission and template once, then validate every manifest of the group.
+
+        An error while resolving the group only fails the manifests of that group.
+        """
+        try:
+            plan, error = await self._get_group_plan(current_identity, project_code, manifest_name)
+        except Exception as e:
+            self._logger.error(f'Error resolving manifest {manifest_name} of {project_code}: {e}')
+            plan, error = None, (EAPIResponseCode.internal_error, str(e))
+        if error is not None:
+            return [error] * len(manifests)
+        return [self._validate_attributes(plan, manifest.get('attributes', {})) for manifest in manifests]
+
+    @router.post(
+        '/validate/manifests',
+        tags=[_API_TAG],
+        response_model=ManifestsValidateResponse,
+        summary='Validate a list of manifests for projects',
+    )
+    @catch_internal(_API_NAMESPACE)
+    async def validate_manifests(
+        self,
+        request_payload: ManifestsValidatePost,
+        current_identity: dict = Depends(jwt_required)
+    ):
+        """Validate many manifests, checking permission and template once per project and manifest name."""
+        self._logger.info('API validate_manifests'.center(80, '-'))
+        api_response = ManifestsValidateResponse()
+        try:
+            _ = current_identity['username']
+        except (AttributeError, TypeError):
+            return current_identity
+        manifests = request_payload.manifests
+        self._logger.info(f'Received {len(manifests)} manifests')
+        if len(manifests) > ConfigClass.VALIDATE_MANIFESTS_MAX:
+            api_response.code = EAPIResponseCode.bad_request
+            api_response.error_msg = f'Too many manifests, at most {ConfigClass.VALIDATE_MANIFESTS_MAX} per request'
+            return api_response.json_response()
+        results = [None] * len(manifests)
+        groups = {}
+        for index, manifest in enumerate(manifests):
+            if not manifest.get('manifest_name') or not manifest.get('project_code'):
+                results[index] = (EAPIResponseCode.bad_request, 'manifest_name and project_code are required')
+                continue
+            groups.setdefault((manifest['project_code'], manifest['manifest_name']), []).append(index)
+        self._logger.info(f'Validating {len(groups)} project and manifest groups')
+        group_results = await gather_bounded(
+            (
+                self._validate_manifest_group(
+                    current_identity, project_code, manifest_name, [manifests[i] for i in indexes]
+                )
+                for (project_code, manifest_name), indexes in groups.items()
+            ),
+            ConfigClass.PERMISSION_CHECK_CONCURRENCY,
+        )
+        for indexes, group_result in zip(groups.values(), group_results):
+            for index, result in zip(indexes, group_result):
+                results[index] = result
+        api_response.result = [
+            {
+                'manifest_name': manifest.get('manifest_name'),
+                'project_code': manifest.get('project_code'),
+                'file_path': manifest.get('file_path'),
+                'code': code.value,
+                'error_msg': error_msg,
+                'result': 'valid' if code == EAPIResponseCode.success else 'invalid',
+            }
+            for manifest, (code, error_msg) in zip(manifests, results)
+        ]
+        api_response.code = EAPIResponseCode.success
+        return api_response.json_response()
+
     @router.post(
         '/validate/env', tags=[_API_TAG], response_model=EnvValidateResponse, summary='Validate env for CLI commands'
     )
@@ -133,7 +241,7 @@ class APIValidation:
         }
         if encrypted_msg:
             try:
-                current_zone = decryption(encrypted_msg, ConfigClass.CLI_SECRET)
+                current_zone = await decryption(encrypted_msg, ConfigClass.CLI_SECRET)
             except InvalidEncryptionError as e:
                 self._logger.error(f'Invalid encryption: {e}')
                 api_response.code = EAPIResponseCode.bad_request
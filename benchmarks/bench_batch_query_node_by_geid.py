@@ -0,0 +1,74 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark batch_query_node_by_geid against a simulated metadata service.
+
+Run from the repository root:
+
+    python benchmarks/bench_batch_query_node_by_geid.py
+
+Every downstream batch call costs a fixed simulated latency, so the total
+time should grow linearly with the number of geids.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for name in [
+    'AUTH_SERVICE', 'UPLOAD_SERVICE_GREENROOM', 'UPLOAD_SERVICE_CORE', 'DATASET_SERVICE', 'HPC_SERVICE',
+    'KG_SERVICE', 'AUDIT_TRAIL_SERVICE', 'METADATA_SERVICE', 'PROJECT_SERVICE', 'REDIS_HOST',
+    'REDIS_PASSWORD', 'REDIS_DB', 'REDIS_PORT',
+]:
+    os.environ.setdefault(name, 'http://benchmark')
+
+import httpx  # noqa: E402
+
+from app.config import ConfigClass  # noqa: E402
+from app.resources.helpers import batch_query_node_by_geid  # noqa: E402
+from app.resources.http_clients import service_clients  # noqa: E402
+
+LATENCY = 0.01
+SIZES = [1000, 5000, 10000, 25000, 50000]
+
+
+async def metadata_service(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(LATENCY)
+    geids = request.url.params.get_list('ids')
+    nodes = [{'id': geid, 'archived': False, 'container_code': 'project', 'zone': 0} for geid in geids]
+    return httpx.Response(200, json={'code': 200, 'result': nodes})
+
+
+async def main():
+    service_clients._clients['METADATA_SERVICE'] = httpx.AsyncClient(
+        transport=httpx.MockTransport(metadata_service))
+    sys.stdout.write(
+        f'chunk size {ConfigClass.GEID_BATCH_CHUNK_SIZE}, concurrency {ConfigClass.GEID_BATCH_CONCURRENCY}\n'
+    )
+    sys.stdout.write(f'{"geids":>8} {"seconds":>9} {"us/geid":>9}\n')
+    for size in SIZES:
+        geids = [f'geid-{i}' for i in range(size)]
+        start = time.perf_counter()
+        located, _ = await batch_query_node_by_geid(geids)
+        elapsed = time.perf_counter() - start
+        assert len(located) == size
+        sys.stdout.write(f'{size:>8} {elapsed:>9.3f} {elapsed / size * 1e6:>9.1f}\n')
+    await service_clients.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
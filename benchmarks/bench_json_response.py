@@ -0,0 +1,79 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Compare APIResponse serialization with stdlib json and with orjson.
+
+Run from the repository root:
+
+    python benchmarks/bench_json_response.py
+
+The payloads look like metadata item listings as returned by the folder
+search and the geid batch query.
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.models.base_models import APIResponse  # noqa: E402
+
+SIZES = [100, 1000, 10000, 50000]
+
+
+def make_item(i):
+    return {
+        'id': f'{i:08d}-fake-geid',
+        'parent': 'fake-parent-id',
+        'parent_path': 'admin/folder',
+        'restore_path': None,
+        'archived': False,
+        'type': 'file',
+        'zone': 0,
+        'name': f'file_{i}.png',
+        'size': 1048576,
+        'owner': 'admin',
+        'container_code': 'test_project',
+        'container_type': 'project',
+        'created_time': '2022-06-06 15:21:55.723898',
+        'last_updated_time': '2022-06-06 15:21:55.723911',
+        'storage': {'id': 'storage-id', 'location_uri': 'minio://bucket/admin/folder', 'version': 'version-id'},
+        'extended': {'id': 'extended-id', 'extra': {'tags': ['tag'], 'system_tags': [], 'attributes': {}}},
+    }
+
+
+def stdlib_response(response):
+    data = response.dict()
+    data['code'] = response.code.value
+    return JSONResponse(status_code=response.code.value, content=data)
+
+
+def main():
+    sys.stdout.write(f'{"items":>8} {"stdlib ms":>10} {"orjson ms":>10} {"speedup":>8}\n')
+    for size in SIZES:
+        response = APIResponse()
+        response.result = [make_item(i) for i in range(size)]
+        assert stdlib_response(response).body.decode() == response.json_response().body.decode()
+        number = max(1, 20000 // size)
+        old = timeit.timeit(lambda: stdlib_response(response), number=number) / number
+        new = timeit.timeit(response.json_response, number=number) / number
+        sys.stdout.write(f'{size:>8} {old * 1e3:>10.2f} {new * 1e3:>10.2f} {old / new:>7.1f}x\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark manifest validation against large attribute templates.
+
+Run from the repository root:
+
+    python benchmarks/bench_manifest_validation.py
+
+legacy rebuilds the allowed names list and scans option lists for every
+manifest, compiled builds a plan per manifest and cached reuses the plan
+stored under the template id.
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for name in [
+    'AUTH_SERVICE', 'UPLOAD_SERVICE_GREENROOM', 'UPLOAD_SERVICE_CORE', 'DATASET_SERVICE', 'HPC_SERVICE',
+    'KG_SERVICE', 'AUDIT_TRAIL_SERVICE', 'METADATA_SERVICE', 'PROJECT_SERVICE', 'REDIS_HOST',
+    'REDIS_PASSWORD', 'REDIS_DB', 'REDIS_PORT',
+]:
+    os.environ.setdefault(name, 'http://benchmark')
+
+from app.resources.validation_service import ValidationPlan  # noqa: E402
+from app.resources.validation_service import get_validation_plan  # noqa: E402
+
+SIZES = [10, 100, 500, 1000]
+OPTIONS = 200
+MANIFESTS = 200
+
+
+def make_template(size):
+    return [
+        {
+            'name': f'attr_{i}',
+            'optional': False,
+            'type': 'multiple_choice' if i % 2 else 'text',
+            'options': [f'option_{j}' for j in range(OPTIONS)] if i % 2 else None,
+        }
+        for i in range(size)
+    ]
+
+
+def legacy_validate(current_attribute, target_attribute):
+    allowed_attributes = [attr.get('name') for attr in target_attribute]
+    for attr in current_attribute.keys():
+        if attr not in allowed_attributes:
+            return f'invalid attribute {attr}'
+    for attr in target_attribute:
+        value = current_attribute.get(attr.get('name'))
+        if not value:
+            return 'missing'
+        if attr.get('type') == 'multiple_choice' and value not in attr.get('options'):
+            return 'invalid choice'
+
+
+def main():
+    sys.stdout.write(f'{"attrs":>6} {"legacy ms":>10} {"compiled ms":>12} {"cached ms":>10}\n')
+    for size in SIZES:
+        template = make_template(size)
+        manifest = {
+            attr['name']: f'option_{OPTIONS - 1}' if attr['options'] else 'text' for attr in template
+        }
+        assert legacy_validate(manifest, template) is None
+        ValidationPlan(template).validate(manifest)
+        legacy = timeit.timeit(lambda: legacy_validate(manifest, template), number=MANIFESTS)
+        compiled = timeit.timeit(lambda: ValidationPlan(template).validate(manifest), number=MANIFESTS)
+        cached = timeit.timeit(
+            lambda: get_validation_plan(template, 'template-id').validate(manifest), number=MANIFESTS
+        )
+        sys.stdout.write(f'{size:>6} {legacy * 1e3:>10.1f} {compiled * 1e3:>12.1f} {cached * 1e3:>10.1f}\n')
+    sys.stdout.write(f'(total for {MANIFESTS} manifests, {OPTIONS} options per multiple_choice attribute)\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -21,7 +21,19 @@ from pydantic import BaseModel
 
 from app.config import ConfigClass
 from app.main import create_app
+from app.resources.dataset_cache import dataset_cache
+from app.resources.dataset_cache import dataset_list_cache
+from app.resources.dataset_cache import dataset_version_cache
 from app.resources.dependencies import jwt_required
+from app.resources.dependencies import user_cache
+from app.resources.hpc import submit_semaphores
+from app.resources.hpc_cluster_cache import hpc_cluster_cache
+from app.resources.hpc_job_watch import hpc_job_watch
+from app.resources.permission_cache import permission_cache
+from app.resources.policy_engine import policy_engine
+from app.resources.project_client import project_list_cache
+from app.resources.template_cache import template_cache
+from app.resources.validation_service import decrypted_messages
 from app.routers.v1.api_kg import APIProject
 
 
@@ -103,3 +115,20 @@ def mock_settings(monkeypatch):
     monkeypatch.setattr(ConfigClass, 'AUTH_SERVICE', 'http://service_auth')
     monkeypatch.setattr(ConfigClass, 'METADATA_SERVICE', 'http://metadata_service')
     monkeypatch.setattr(ConfigClass, 'DATASET_SERVICE', 'http://dataset_service')
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    yield
+    user_cache.clear()
+    permission_cache.clear()
+    policy_engine.clear()
+    template_cache.clear()
+    decrypted_messages.clear()
+    dataset_cache.clear()
+    dataset_list_cache.clear()
+    dataset_version_cache.clear()
+    project_list_cache.clear()
+    hpc_cluster_cache.clear()
+    hpc_job_watch.clear()
+    submit_semaphores.clear()
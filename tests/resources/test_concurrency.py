@@ -0,0 +1,89 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+
+from app.resources.concurrency import fan_out
+from app.resources.concurrency import iter_pages
+
+pytestmark = pytest.mark.asyncio
+
+
+async def delayed(value, delay):
+    await asyncio.sleep(delay)
+    return value
+
+
+async def failing(delay):
+    await asyncio.sleep(delay)
+    raise ValueError('downstream failed')
+
+
+async def test_fan_out_should_run_calls_concurrently():
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+    results = await fan_out({'first': delayed(1, 0.05), 'second': delayed(2, 0.05)})
+    assert results == {'first': 1, 'second': 2}
+    assert loop.time() - start < 0.09
+
+
+async def test_fan_out_should_cancel_pending_calls_on_abort():
+    slow = asyncio.ensure_future(delayed('slow', 1))
+    results = await fan_out(
+        {'permission': delayed(False, 0), 'slow': slow},
+        abort=lambda done: done.get('permission') is False,
+    )
+    await asyncio.sleep(0)
+    assert results == {'permission': False}
+    assert slow.cancelled()
+
+
+async def test_fan_out_should_raise_first_failure():
+    slow = asyncio.ensure_future(delayed('slow', 1))
+    with pytest.raises(ValueError):
+        await fan_out({'failing': failing(0), 'slow': slow})
+    await asyncio.sleep(0)
+    assert slow.cancelled()
+
+
+async def test_fan_out_guard_result_should_win_over_failure():
+    results = await fan_out(
+        {'permission': delayed(False, 0.02), 'failing': failing(0)},
+        abort=lambda done: done.get('permission') is False,
+        guard='permission',
+    )
+    assert results == {'permission': False}
+
+
+async def test_fan_out_should_raise_failure_when_guard_allows():
+    with pytest.raises(ValueError):
+        await fan_out(
+            {'permission': delayed(True, 0.02), 'failing': failing(0)},
+            abort=lambda done: done.get('permission') is False,
+            guard='permission',
+        )
+
+
+async def test_iter_pages_should_raise_on_failed_page():
+    async def fetch_page(page):
+        return None if page == 1 else [page, page]
+
+    pages = []
+    with pytest.raises(LookupError, match='Cannot fetch page 1'):
+        async for items in iter_pages(fetch_page, 2, 2):
+            pages.append(items)
+    assert pages == [[0, 0]]
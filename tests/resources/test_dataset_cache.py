@@ -0,0 +1,70 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from app.config import ConfigClass
+from app.resources.helpers import get_dataset_versions
+
+pytestmark = pytest.mark.asyncio
+dataset_geid = 'test-dataset-geid'
+versions_url = f'http://dataset_service/v1/dataset/{dataset_geid}/versions'
+
+
+def version(number, created_at):
+    return {
+        'id': number,
+        'dataset_code': 'testdataset',
+        'dataset_geid': dataset_geid,
+        'version': number,
+        'created_by': 'testuser',
+        'created_at': created_at,
+        'location': f'minio-path-{number}',
+        'notes': '',
+    }
+
+
+def mock_versions(httpx_mock, page, page_size, versions, total):
+    httpx_mock.add_response(
+        method='GET',
+        url=(
+            f'{versions_url}?dataset_geid={dataset_geid}&page={page}&page_size={page_size}'
+            '&order=desc&sorting=created_at'
+        ),
+        json={'code': 200, 'error_msg': '', 'total': total, 'result': versions},
+        status_code=200,
+    )
+
+
+async def test_dataset_versions_should_be_served_from_memory_once_complete(httpx_mock):
+    mock_versions(httpx_mock, 0, 2, [version('1.1', '2022-03-02'), version('1.0', '2022-03-01')], 2)
+    event = {'dataset_geid': dataset_geid, 'page': 0, 'page_size': 2}
+    first = await get_dataset_versions(event)
+    assert [record['version'] for record in first] == ['1.1', '1.0']
+    assert await get_dataset_versions(event) == first
+    assert await get_dataset_versions({**event, 'page': '1'}) == []
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_dataset_versions_should_only_refetch_newest_page_after_ttl(httpx_mock, mocker):
+    mocker.patch.object(ConfigClass, 'DATASET_CACHE_TTL', 0)
+    mock_versions(httpx_mock, 0, 1, [version('1.1', '2022-03-02')], 2)
+    mock_versions(httpx_mock, 1, 1, [version('1.0', '2022-03-01')], 2)
+    mock_versions(httpx_mock, 0, 1, [version('2.0', '2022-03-03')], 3)
+    event = {'dataset_geid': dataset_geid, 'page': 1, 'page_size': 1}
+    assert [record['version'] for record in await get_dataset_versions(event)] == ['1.0']
+    # a new version was published, the second page moved without fetching it
+    assert [record['version'] for record in await get_dataset_versions(event)] == ['1.1']
+    assert len(httpx_mock.get_requests()) == 3
@@ -13,22 +13,57 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import base64
+import json
 import time
 
 import jwt
 import pytest
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
 from fastapi import Request
 
+from app.config import ConfigClass
 from app.models.project_models import POSTProjectFile
+from app.resources.dependencies import has_permission
 from app.resources.dependencies import jwt_required
 from app.resources.dependencies import transfer_to_pre
 from app.resources.dependencies import validate_upload_event
 from app.resources.error_handler import APIException
+from app.resources.signing_keys import jwk_to_public_key
+from app.resources.signing_keys import signing_keys
 
 pytestmark = pytest.mark.asyncio
 project_code = 'test_project'
 
 
+def _int_to_b64(value):
+    raw = value.to_bytes((value.bit_length() + 7) // 8, 'big')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+@pytest.fixture
+def rsa_key():
+    private_key = rsa.generate_private_key(
+        public_exponent=65537, key_size=2048, backend=default_backend())
+    numbers = private_key.public_key().public_numbers()
+    return {
+        'private': private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ),
+        'jwk': {
+            'kid': 'test-kid',
+            'kty': 'RSA',
+            'use': 'sig',
+            'n': _int_to_b64(numbers.n),
+            'e': _int_to_b64(numbers.e),
+        },
+    }
+
+
 async def test_jwt_required_should_return_successed(httpx_mock):
     mock_request = Request(scope={'type': 'http'})
     encoded_jwt = jwt.encode({
@@ -136,3 +171,180 @@ async def test_transfer_to_pre_with_external_service_fail():
     result = await transfer_to_pre(mock_post_model, project_code, 'session_id')
     response = result.__dict__
     assert response['status_code'] == 403
+
+
+async def test_transfer_to_pre_in_shards_should_merge_results(httpx_mock, mocker):
+    mocker.patch.object(ConfigClass, 'PREUPLOAD_SHARD_SIZE', 2)
+    post_model = POSTProjectFile(
+        operator='operator',
+        job_type='AS_FILE',
+        upload_message='upload_message',
+        zone='cr',
+        filename='file',
+        current_folder_node='',
+        data=[{'resumable_filename': f'file_{i}'} for i in range(3)],
+    )
+    for files in [['file_0', 'file_1'], ['file_2']]:
+        httpx_mock.add_response(
+            method='POST',
+            url='http://data_upload_cr/v1/files/jobs',
+            match_content=json.dumps({
+                'current_folder_node': '',
+                'project_code': project_code,
+                'operator': 'operator',
+                'upload_message': 'upload_message',
+                'data': [{'resumable_filename': name} for name in files],
+                'job_type': 'AS_FILE',
+            }).encode(),
+            json={'code': 200, 'result': [{'job_id': name} for name in files]},
+            status_code=200,
+        )
+    result = await transfer_to_pre(
+        post_model, project_code, {'Session-ID': 'session_id', 'authorization': 'fake-token'}
+    )
+    assert result.status_code == 200
+    assert result.json()['result'] == [
+        {'job_id': 'file_0'}, {'job_id': 'file_1'}, {'job_id': 'file_2'}
+    ]
+
+
+async def test_transfer_to_pre_in_shards_should_report_failed_shard(httpx_mock, mocker):
+    mocker.patch.object(ConfigClass, 'PREUPLOAD_SHARD_SIZE', 2)
+    post_model = POSTProjectFile(
+        operator='operator',
+        job_type='AS_FILE',
+        upload_message='upload_message',
+        zone='cr',
+        filename='file',
+        current_folder_node='',
+        data=[{'resumable_filename': f'file_{i}'} for i in range(4)],
+    )
+    httpx_mock.add_response(
+        method='POST',
+        url='http://data_upload_cr/v1/files/jobs',
+        json={'code': 200, 'result': [{'job_id': 'job'}]},
+        status_code=200,
+    )
+    httpx_mock.add_response(
+        method='POST',
+        url='http://data_upload_cr/v1/files/jobs',
+        json={'code': 409, 'error_msg': 'file_2 already exists'},
+        status_code=409,
+    )
+    result = await transfer_to_pre(
+        post_model, project_code, {'Session-ID': 'session_id', 'authorization': 'fake-token'}
+    )
+    assert result.status_code == 409
+    assert result.json()['error_msg'] == (
+        '1 of 2 shards failed, shard 2/2 (files 2-3): file_2 already exists'
+    )
+
+
+async def test_jwt_required_should_cache_user_lookup(httpx_mock):
+    mock_request = Request(scope={'type': 'http'})
+    encoded_jwt = jwt.encode({
+        'realm_access': {'roles': ['platform_admin']},
+        'preferred_username': 'test_user',
+        'exp': time.time() + 30
+    }, key='unittest', algorithm='HS256').decode('utf-8')
+    mock_request._headers = {'Authorization': 'Bearer ' + encoded_jwt}
+    httpx_mock.add_response(
+        method='GET',
+        url='http://service_auth/v1/admin/user?username=test_user',
+        json={
+            'result': {'id': 1, 'role': 'admin'}},
+        status_code=200,
+    )
+    await jwt_required(mock_request)
+    test_result = await jwt_required(mock_request)
+    assert test_result['user_id'] == 1
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_jwt_required_with_signature_verification_should_return_successed(
+    httpx_mock,
+    monkeypatch,
+    rsa_key
+):
+    monkeypatch.setattr(ConfigClass, 'JWT_VERIFY_SIGNATURE', True)
+    monkeypatch.setattr(ConfigClass, 'JWT_JWKS_URL', 'http://keycloak/certs')
+    monkeypatch.setattr(signing_keys, '_keys', {})
+    monkeypatch.setattr(signing_keys, '_fetched_at', 0)
+    httpx_mock.add_response(
+        method='GET',
+        url='http://keycloak/certs',
+        json={'keys': [rsa_key['jwk']]},
+        status_code=200,
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url='http://service_auth/v1/admin/user?username=test_user',
+        json={
+            'result': {'id': 1, 'role': 'admin'}},
+        status_code=200,
+    )
+    mock_request = Request(scope={'type': 'http'})
+    encoded_jwt = jwt.encode({
+        'realm_access': {'roles': ['platform_admin']},
+        'preferred_username': 'test_user',
+        'exp': time.time() + 30
+    }, key=rsa_key['private'], algorithm='RS256', headers={'kid': 'test-kid'}).decode('utf-8')
+    mock_request._headers = {'Authorization': 'Bearer ' + encoded_jwt}
+    test_result = await jwt_required(mock_request)
+    assert test_result['code'] == 200
+    assert test_result['username'] == 'test_user'
+
+
+async def test_jwt_required_with_invalid_signature_should_return_unauthorized(
+    monkeypatch,
+    rsa_key
+):
+    monkeypatch.setattr(ConfigClass, 'JWT_VERIFY_SIGNATURE', True)
+    monkeypatch.setattr(signing_keys, '_keys', {'test-kid': jwk_to_public_key(rsa_key['jwk'])})
+    monkeypatch.setattr(signing_keys, '_fetched_at', time.monotonic())
+    mock_request = Request(scope={'type': 'http'})
+    encoded_jwt = jwt.encode({
+        'realm_access': {'roles': ['platform_admin']},
+        'preferred_username': 'test_user',
+        'exp': time.time() + 30
+    }, key='unittest', algorithm='HS256', headers={'kid': 'test-kid'}).decode('utf-8')
+    mock_request._headers = {'Authorization': 'Bearer ' + encoded_jwt}
+    test_result = await jwt_required(mock_request)
+    assert test_result.status_code == 401
+
+
+async def test_jwt_required_when_signing_keys_are_unavailable_should_return_503(
+    httpx_mock,
+    monkeypatch,
+    rsa_key
+):
+    monkeypatch.setattr(ConfigClass, 'JWT_VERIFY_SIGNATURE', True)
+    monkeypatch.setattr(ConfigClass, 'JWT_JWKS_URL', 'http://keycloak/certs')
+    monkeypatch.setattr(signing_keys, '_keys', {})
+    monkeypatch.setattr(signing_keys, '_fetched_at', 0)
+    httpx_mock.add_response(method='GET', url='http://keycloak/certs', status_code=502)
+    mock_request = Request(scope={'type': 'http'})
+    encoded_jwt = jwt.encode({
+        'realm_access': {'roles': ['platform_admin']},
+        'preferred_username': 'test_user',
+        'exp': time.time() + 30
+    }, key=rsa_key['private'], algorithm='RS256', headers={'kid': 'test-kid'}).decode('utf-8')
+    mock_request._headers = {'Authorization': 'Bearer ' + encoded_jwt}
+    test_result = await jwt_required(mock_request)
+    assert test_result.status_code == 503
+
+
+async def test_has_permission_should_cache_decision(httpx_mock):
+    identity = {'role': 'admin', 'realm_roles': ['platform-admin']}
+    httpx_mock.add_response(
+        method='GET',
+        url=(
+            'http://service_auth/v1/authorize'
+            '?role=platform_admin&resource=file&zone=gr&operation=view'
+        ),
+        json={'result': {'has_permission': True}},
+        status_code=200,
+    )
+    assert await has_permission(identity, project_code, 'file', 'gr', 'view')
+    assert await has_permission(identity, project_code, 'file', 'gr', 'view')
+    assert len(httpx_mock.get_requests()) == 1
@@ -0,0 +1,93 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+import pytest_asyncio
+
+from app.config import ConfigClass
+from app.resources.hpc_cluster_cache import hpc_cluster_cache
+
+pytestmark = pytest.mark.asyncio
+
+NODES_URL = 'http://service_hpc/v1/hpc/nodes?slurm_host=host&username=username&protocol=http'
+
+
+@pytest_asyncio.fixture
+async def cluster_cache():
+    yield hpc_cluster_cache
+    await hpc_cluster_cache.close()
+
+
+def add_nodes_response(httpx_mock):
+    httpx_mock.add_response(
+        method='GET',
+        url=NODES_URL,
+        json={'result': [{'hostname1': {'cores': 42}}, {'hostname2': {}}], 'code': 200},
+        status_code=200,
+    )
+
+
+async def test_nodes_should_be_fetched_once_for_all_requests(httpx_mock, cluster_cache):
+    add_nodes_response(httpx_mock)
+    first = await cluster_cache.nodes('http://host', 'username', 'token')
+    second = await cluster_cache.nodes('http://host', 'username', 'token')
+    assert first == second == [{'hostname1': {'cores': 42}}, {'hostname2': {}}]
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_node_should_be_served_from_snapshot(httpx_mock, cluster_cache):
+    add_nodes_response(httpx_mock)
+    await cluster_cache.nodes('http://host', 'username', 'token')
+    node = await cluster_cache.node('http://host', 'username', 'token', 'hostname1')
+    assert node == [{'hostname1': {'cores': 42}}]
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_node_missing_from_snapshot_should_ask_hpc_service(httpx_mock, cluster_cache):
+    add_nodes_response(httpx_mock)
+    httpx_mock.add_response(
+        method='GET',
+        url='http://service_hpc/v1/hpc/nodes/new_node?slurm_host=host&username=username&protocol=http',
+        json={'result': [{'new_node': {}}], 'code': 200},
+        status_code=200,
+    )
+    node = await cluster_cache.node('http://host', 'username', 'token', 'new_node')
+    assert node == [{'new_node': {}}]
+
+
+async def test_snapshot_should_not_be_shared_across_tokens(httpx_mock, cluster_cache):
+    add_nodes_response(httpx_mock)
+    await cluster_cache.nodes('http://host', 'username', 'token')
+    await cluster_cache.nodes('http://host', 'username', 'other-token')
+    assert len(httpx_mock.get_requests()) == 2
+
+
+async def test_old_snapshot_should_be_reloaded(httpx_mock, cluster_cache, monkeypatch):
+    add_nodes_response(httpx_mock)
+    monkeypatch.setattr(ConfigClass, 'HPC_SNAPSHOT_MAX_AGE', 0)
+    await cluster_cache.nodes('http://host', 'username', 'token')
+    await cluster_cache.nodes('http://host', 'username', 'token')
+    assert len(httpx_mock.get_requests()) == 2
+
+
+async def test_idle_snapshots_should_be_stopped_without_new_requests(httpx_mock, cluster_cache, monkeypatch):
+    add_nodes_response(httpx_mock)
+    await cluster_cache.nodes('http://host', 'username', 'token')
+    [snapshot] = cluster_cache._snapshots.values()
+    assert snapshot.running and cluster_cache.running
+    monkeypatch.setattr(ConfigClass, 'HPC_SNAPSHOT_IDLE_TIMEOUT', -1)
+    await cluster_cache.refresh()
+    assert not snapshot.running
+    assert not cluster_cache._snapshots
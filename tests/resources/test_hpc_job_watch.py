@@ -0,0 +1,68 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+
+from app.config import ConfigClass
+from app.resources.hpc_job_watch import hpc_job_watch
+from app.resources.hpc_job_watch import is_finished
+
+pytestmark = pytest.mark.asyncio
+
+JOB_URL = 'http://service_hpc/v1/hpc/job/12345?slurm_host=host&username=username&protocol=http'
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(ConfigClass, 'HPC_JOB_WATCH_INTERVAL', 0)
+
+
+def add_job_response(httpx_mock, state):
+    httpx_mock.add_response(
+        method='GET',
+        url=JOB_URL,
+        json={'result': {'job_id': '12345', 'job_state': state}, 'code': 200},
+        status_code=200,
+    )
+
+
+async def collect():
+    return [event async for event in hpc_job_watch.watch('12345', 'http://host', 'username', 'token')]
+
+
+def test_is_finished_should_ignore_slurm_state_details():
+    assert is_finished({'job_state': 'CANCELLED by 1000'})
+    assert not is_finished({'job_state': 'RUNNING'})
+    assert not is_finished({})
+
+
+async def test_watchers_should_share_one_poller(httpx_mock):
+    add_job_response(httpx_mock, 'RUNNING')
+    add_job_response(httpx_mock, 'RUNNING')
+    add_job_response(httpx_mock, 'COMPLETED')
+    first, second = await asyncio.gather(collect(), collect())
+    expected = [
+        ('state', {'job_id': '12345', 'job_state': 'RUNNING'}),
+        ('state', {'job_id': '12345', 'job_state': 'COMPLETED'}),
+    ]
+    assert first == second == expected
+    assert len(httpx_mock.get_requests()) == 3
+
+
+async def test_unknown_job_should_end_with_error_event(httpx_mock):
+    httpx_mock.add_response(method='GET', url=JOB_URL, json={'error_msg': 'unknown job'}, status_code=200)
+    assert await collect() == [('error', {'code': 404, 'error_msg': 'Job ID not found'})]
@@ -0,0 +1,122 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+
+import jwt as pyjwt
+import pytest
+
+from app.config import ConfigClass
+from app.resources.hpc import get_hpc_jwt_token
+from app.resources.hpc import submit_hpc_jobs
+from app.resources.hpc_token_cache import OWNER_PREFIX
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.expiry = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+        self.expiry[key] = ex
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.expiry.pop(key, None)
+
+    def tokens(self):
+        return {key: value for key, value in self.values.items() if not key.startswith(OWNER_PREFIX)}
+
+
+@pytest.fixture
+def redis(mocker, monkeypatch):
+    monkeypatch.setattr(ConfigClass, 'CLI_SECRET', 'unittest')
+    fake = FakeRedis()
+    mocker.patch('app.resources.hpc_token_cache.get_redis', return_value=fake)
+    return fake
+
+
+def add_auth_response(httpx_mock, token):
+    httpx_mock.add_response(
+        method='POST',
+        url='http://service_hpc/v1/hpc/auth',
+        json={'result': {'token': token}},
+        status_code=200,
+    )
+
+
+async def test_get_hpc_jwt_token_should_reuse_cached_token(httpx_mock, redis):
+    add_auth_response(httpx_mock, 'fake-token')
+    result = await get_hpc_jwt_token('issuer', 'user', 'password')
+    assert await get_hpc_jwt_token('issuer', 'user', 'password') == result == {'token': 'fake-token'}
+    assert len(httpx_mock.get_requests()) == 1
+    assert all('password' not in key for key in redis.values)
+
+
+async def test_get_hpc_jwt_token_should_not_share_token_across_credentials(httpx_mock, redis):
+    add_auth_response(httpx_mock, 'fake-token')
+    await get_hpc_jwt_token('issuer', 'user', 'password')
+    await get_hpc_jwt_token('issuer', 'user', 'other-password')
+    await get_hpc_jwt_token('issuer', 'other-user', 'password')
+    assert len(httpx_mock.get_requests()) == 3
+    assert len(redis.tokens()) == 3
+
+
+async def test_hpc_token_should_expire_before_the_jwt_does(httpx_mock, redis):
+    token = pyjwt.encode({'exp': int(time.time()) + 600}, 'secret').decode()
+    add_auth_response(httpx_mock, token)
+    await get_hpc_jwt_token('issuer', 'user', 'password')
+    [ttl] = {redis.expiry[key] for key in redis.tokens()}
+    assert 0 < ttl <= 600 - ConfigClass.HPC_TOKEN_EXPIRY_MARGIN
+
+
+async def test_nearly_expired_hpc_token_should_not_be_cached(httpx_mock, redis):
+    token = pyjwt.encode({'exp': int(time.time()) + 10}, 'secret').decode()
+    add_auth_response(httpx_mock, token)
+    await get_hpc_jwt_token('issuer', 'user', 'password')
+    assert redis.values == {}
+
+
+async def test_hpc_token_should_not_be_cached_without_cli_secret(httpx_mock, redis, monkeypatch):
+    monkeypatch.setattr(ConfigClass, 'CLI_SECRET', '')
+    add_auth_response(httpx_mock, 'fake-token')
+    add_auth_response(httpx_mock, 'fake-token')
+    await get_hpc_jwt_token('issuer', 'user', 'password')
+    await get_hpc_jwt_token('issuer', 'user', 'password')
+    assert len(httpx_mock.get_requests()) == 2
+    assert redis.values == {}
+
+
+async def test_hpc_token_rejected_by_hpc_should_be_evicted(httpx_mock, redis):
+    add_auth_response(httpx_mock, 'fake-token')
+    add_auth_response(httpx_mock, 'new-token')
+    httpx_mock.add_response(
+        method='POST',
+        url='http://service_hpc/v1/hpc/job',
+        json={'code': 500, 'error_msg': 'Zero Bytes were transmitted or received'},
+        status_code=200,
+    )
+    await get_hpc_jwt_token('issuer', 'user', 'password')
+    [result] = await submit_hpc_jobs('http://host', 'user', 'fake-token', [{'script': 'hello'}])
+    assert result == {'code': 403, 'error_msg': 'HPC token expired'}
+    assert redis.values == {}
+    assert await get_hpc_jwt_token('issuer', 'user', 'password') == {'token': 'new-token'}
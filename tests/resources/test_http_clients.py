@@ -0,0 +1,46 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from app.config import ConfigClass
+from app.resources.http_clients import ServiceClients
+
+pytestmark = pytest.mark.asyncio
+
+
+async def test_service_clients_should_reuse_client_per_service():
+    clients = ServiceClients()
+    metadata_client = clients.get('METADATA_SERVICE')
+    assert clients.get('METADATA_SERVICE') is metadata_client
+    assert clients.get('AUTH_SERVICE') is not metadata_client
+    await clients.close()
+
+
+async def test_service_clients_close_should_reopen_on_next_get():
+    clients = ServiceClients()
+    clients.open()
+    metadata_client = clients.get('METADATA_SERVICE')
+    await clients.close()
+    assert metadata_client.is_closed
+    assert not clients.get('METADATA_SERVICE').is_closed
+    await clients.close()
+
+
+async def test_service_clients_should_apply_per_service_limit(monkeypatch):
+    monkeypatch.setattr(ConfigClass, 'HTTPX_POOL_LIMITS', {'METADATA_SERVICE': 5})
+    clients = ServiceClients()
+    assert clients._limits('METADATA_SERVICE').max_connections == 5
+    assert clients._limits('AUTH_SERVICE').max_connections == ConfigClass.HTTPX_MAX_CONNECTIONS
@@ -0,0 +1,52 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from app.config import ConfigClass
+from app.resources.permission_cache import PermissionCache
+from app.resources.permission_cache import permission_cache
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    async def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[field.encode()] = fields.get(field.encode(), 0) + amount
+
+    async def hgetall(self, key):
+        return {field: str(count).encode() for field, count in self.hashes.get(key, {}).items()}
+
+
+@pytest.fixture
+def redis(mocker):
+    fake = FakeRedis()
+    mocker.patch('app.resources.cache_invalidation.get_redis', return_value=fake)
+    mocker.patch.object(ConfigClass, 'CACHE_INVALIDATION_CHECK_INTERVAL', 0)
+    return fake
+
+
+async def test_invalidate_should_reach_memory_of_other_workers(redis):
+    worker = PermissionCache()
+    key = ('admin', 'file', 'gr', 'view')
+    assert await worker.get(key) is None
+    await worker.set(key, True)
+    assert await worker.get(key) is True
+    await permission_cache.invalidate()
+    assert await worker.get(key) is None
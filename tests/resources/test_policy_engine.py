@@ -0,0 +1,58 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import pytest
+
+from app.resources.dependencies import has_permission
+from app.resources.periodic import PeriodicRefresher
+from app.resources.policy_engine import policy_engine
+
+pytestmark = pytest.mark.asyncio
+
+rules = [
+    {'role': 'admin', 'resource': 'file', 'zone': 'gr', 'operation': 'view', 'has_permission': True},
+    {'role': 'contributor', 'resource': 'file', 'zone': 'gr', 'operation': 'view', 'has_permission': True},
+    {'role': 'contributor', 'resource': 'file', 'zone': 'cr', 'operation': 'view', 'has_permission': False},
+]
+
+
+async def test_refresh_should_load_permission_matrix(httpx_mock):
+    httpx_mock.add_response(
+        method='GET',
+        url='http://service_auth/v1/authorize/matrix',
+        json={'result': rules},
+        status_code=200,
+    )
+    await policy_engine.refresh()
+    assert policy_engine.loaded
+    assert policy_engine.check('contributor', 'file', 'gr', 'view') is True
+    assert policy_engine.check('contributor', 'file', 'cr', 'view') is False
+    assert policy_engine.check('collaborator', 'file', 'gr', 'view') is None
+
+
+async def test_has_permission_should_use_loaded_matrix_without_network():
+    policy_engine.load(rules)
+    identity = {'role': 'member', 'realm_roles': ['test_project-contributor']}
+    assert await has_permission(identity, 'test_project', 'file', 'gr', 'view') is True
+    assert await has_permission(identity, 'test_project', 'file', 'cr', 'view') is False
+
+
+def test_refresher_without_refresh_should_not_be_created():
+    class Incomplete(PeriodicRefresher):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,54 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pytest
+
+from app.config import ConfigClass
+from app.resources.helpers import get_user_projects
+from app.resources.project_client import get_project_client
+from app.resources.redis_client import get_redis
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture
+def project_service(monkeypatch):
+    monkeypatch.setattr(get_project_client(), 'base_url', 'http://project_service')
+    monkeypatch.setattr(ConfigClass, 'PROJECT_SERVICE', 'http://project_service')
+
+
+async def test_project_client_should_be_shared_and_use_shared_redis():
+    project_client = get_project_client()
+    assert get_project_client() is project_client
+    await project_client.connect_redis()
+    assert project_client.redis is get_redis()
+
+
+async def test_get_user_projects_should_cache_per_realm_roles(httpx_mock, project_service):
+    httpx_mock.add_response(
+        method='GET',
+        url=(
+            'http://project_service/v1/projects/?page=0&page_size=10'
+            '&sort_by=desc&sort_order=created_at&code_any=project1,project2'
+        ),
+        json={'code': 200, 'result': [{'id': 'geid-1', 'name': 'Project 1', 'code': 'project1'}]},
+        status_code=200,
+    )
+    identity = {'role': 'member', 'realm_roles': ['project1-admin', 'project2-collaborator']}
+    projects = await get_user_projects(identity, 0, 10, 'created_at', 'desc')
+    assert projects == [{'name': 'Project 1', 'code': 'project1', 'geid': 'geid-1'}]
+    same_roles = {'role': 'member', 'realm_roles': ['project2-collaborator', 'project1-admin']}
+    assert await get_user_projects(same_roles, 0, 10, 'created_at', 'desc') == projects
+    assert len(httpx_mock.get_requests()) == 1
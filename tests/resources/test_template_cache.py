@@ -0,0 +1,100 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+
+from app.config import ConfigClass
+from app.resources.helpers import get_attribute_templates
+from app.resources.template_cache import TemplateCache
+from app.resources.template_cache import template_cache
+
+pytestmark = pytest.mark.asyncio
+template_url = 'http://metadata_service/v1/template/?project_code=test_project&name=fake_manifest'
+templates = {'code': 200, 'error_msg': '', 'result': [{'id': 'manifest-id', 'attributes': []}]}
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+
+    async def hincrby(self, key, field, amount):
+        fields = self.hashes.setdefault(key, {})
+        fields[field.encode()] = fields.get(field.encode(), 0) + amount
+
+    async def hgetall(self, key):
+        return {field: str(count).encode() for field, count in self.hashes.get(key, {}).items()}
+
+
+@pytest.fixture
+def redis(mocker):
+    fake = FakeRedis()
+    mocker.patch('app.resources.cache_invalidation.get_redis', return_value=fake)
+    mocker.patch.object(ConfigClass, 'CACHE_INVALIDATION_CHECK_INTERVAL', 0)
+    return fake
+
+
+async def test_get_attribute_templates_should_fetch_once_for_concurrent_calls(httpx_mock):
+    httpx_mock.add_response(method='GET', url=template_url, json=templates, status_code=200)
+    results = await asyncio.gather(
+        *[get_attribute_templates('test_project', 'fake_manifest') for _ in range(10)]
+    )
+    assert results == [templates] * 10
+    assert await get_attribute_templates('test_project', 'fake_manifest') == templates
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_get_attribute_templates_should_not_cache_errors(httpx_mock):
+    httpx_mock.add_response(method='GET', url=template_url, json={'code': 500, 'result': []}, status_code=500)
+    httpx_mock.add_response(method='GET', url=template_url, json=templates, status_code=200)
+    assert (await get_attribute_templates('test_project', 'fake_manifest'))['code'] == 500
+    assert await get_attribute_templates('test_project', 'fake_manifest') == templates
+
+
+async def test_stale_templates_should_be_served_while_revalidating(httpx_mock, mocker):
+    mocker.patch.object(ConfigClass, 'TEMPLATE_CACHE_TTL', 0)
+    updated = {'code': 200, 'error_msg': '', 'result': [{'id': 'updated-id', 'attributes': []}]}
+    httpx_mock.add_response(method='GET', url=template_url, json=templates, status_code=200)
+    httpx_mock.add_response(method='GET', url=template_url, json=updated, status_code=200)
+    assert await get_attribute_templates('test_project', 'fake_manifest') == templates
+    assert await get_attribute_templates('test_project', 'fake_manifest') == templates
+    await asyncio.sleep(0.01)
+    assert await get_attribute_templates('test_project', 'fake_manifest') == updated
+
+
+async def test_invalidate_should_only_drop_templates_of_project(redis):
+    template_cache._store(('test_project', None), templates)
+    template_cache._store(('other_project', None), templates)
+    assert await template_cache.invalidate('test_project') == 1
+    assert ('test_project', None) not in template_cache._entries
+    assert ('other_project', None) in template_cache._entries
+
+
+async def test_invalidate_should_reach_other_workers(redis):
+    worker = TemplateCache()
+
+    async def fetch():
+        return templates
+
+    await worker.get(('test_project', None), fetch)
+    await worker.get(('other_project', None), fetch)
+    await template_cache.invalidate('test_project')
+    await worker.get(('other_project', None), fetch)
+    assert ('test_project', None) not in worker._entries
+    assert ('other_project', None) in worker._entries
+    await template_cache.invalidate()
+    await worker.get(('new_project', None), fetch)
+    assert ('other_project', None) not in worker._entries
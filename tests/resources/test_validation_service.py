@@ -0,0 +1,67 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import base64
+
+import pytest
+
+from app.models.error_model import InvalidEncryptionError
+from app.resources import validation_service
+from app.resources.validation_service import ManifestValidator
+from app.resources.validation_service import decryption
+from app.resources.validation_service import derive_fernet
+from app.resources.validation_service import get_validation_plan
+
+pytestmark = pytest.mark.asyncio
+
+target_attribute = [
+    {'name': 'attr1', 'optional': False, 'type': 'multiple_choice', 'options': ['a1', 'a2']},
+    {'name': 'attr2', 'optional': True, 'type': 'text', 'options': None},
+]
+
+
+@pytest.mark.parametrize('attributes,error_msg', [
+    ({'attr1': 'a1', 'attr2': 'text'}, None),
+    ({'attr1': 'a1', 'attr2': 'text', 'attr3': 'x'}, 'invalid attribute attr3'),
+    ({'attr2': 'text'}, 'Field Required attr1'),
+    ({'attr1': 'a3', 'attr2': 'text'}, 'Invalid Choice Field attr1'),
+    ({'attr1': 'a1', 'attr2': 't' * 101}, 'Text Too Long attr2'),
+    ({'attr1': '', 'attr2': 'text'}, 'Missing Required Attribute attr1'),
+])
+async def test_manifest_validator_should_return_first_error(attributes, error_msg):
+    validator = ManifestValidator(attributes, target_attribute, 'template-id')
+    assert await validator.has_valid_attributes() == error_msg
+
+
+def test_validation_plan_should_be_reused_for_same_template():
+    plan = get_validation_plan(target_attribute, 'template-id')
+    assert get_validation_plan(list(target_attribute), 'template-id') is plan
+    changed = target_attribute[:1]
+    assert get_validation_plan(changed, 'template-id') is not plan
+
+
+async def test_decryption_should_derive_key_once_and_cache_result(mocker):
+    secret = base64.b64encode(b'0123456789abcdef').decode()
+    encrypted = base64.b64encode(derive_fernet(secret).encrypt(b'gr')).decode()
+    decrypt = mocker.spy(validation_service, '_decrypt')
+    assert await decryption(encrypted, secret) == 'gr'
+    assert await decryption(encrypted, secret) == 'gr'
+    assert decrypt.call_count == 1
+
+
+async def test_decryption_with_invalid_message_should_raise():
+    secret = base64.b64encode(b'0123456789abcdef').decode()
+    with pytest.raises(InvalidEncryptionError):
+        await decryption('aW52YWxpZA==', secret)
@@ -0,0 +1,76 @@
+# Copyright (C) 2022 Indoc Research
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+import pytest
+
+from app.resources.permission_cache import permission_cache
+from app.resources.template_cache import template_cache
+
+pytestmark = pytest.mark.asyncio
+test_permission_cache_api = '/v1/cache/permissions'
+test_template_cache_api = '/v1/cache/templates'
+
+
+async def test_invalidate_permission_cache_should_return_200(
+    test_async_client_auth
+):
+    await permission_cache.set(('admin', 'file', 'gr', 'view'), True)
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client_auth.delete(
+        test_permission_cache_api,
+        headers=header
+    )
+    assert res.status_code == 200
+    assert res.json().get('result') == 'success'
+    assert await permission_cache.get(('admin', 'file', 'gr', 'view')) is None
+
+
+async def test_invalidate_permission_cache_by_member_should_return_403(
+    test_async_client_project_member_auth
+):
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client_project_member_auth.delete(
+        test_permission_cache_api,
+        headers=header
+    )
+    assert res.status_code == 403
+    assert res.json().get('error_msg') == 'Permission Denied'
+
+
+async def test_invalidate_template_cache_should_return_200(
+    test_async_client_auth
+):
+    template_cache._store(('test_project', 'fake_manifest'), {'code': 200, 'result': []})
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client_auth.delete(
+        test_template_cache_api,
+        headers=header,
+        query_string={'project_code': 'test_project'}
+    )
+    assert res.status_code == 200
+    assert res.json().get('result') == 'success'
+    assert len(template_cache._entries) == 0
+
+
+async def test_invalidate_template_cache_by_member_should_return_403(
+    test_async_client_project_member_auth
+):
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client_project_member_auth.delete(
+        test_template_cache_api,
+        headers=header
+    )
+    assert res.status_code == 403
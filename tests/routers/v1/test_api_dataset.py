@@ -13,9 +13,13 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
+
 import pytest
 from pytest_httpx import HTTPXMock
 
+from app.config import ConfigClass
+
 test_dataset_api = '/v1/datasets'
 dataset_code = 'testdataset'
 dataset_geid = 'test-dataset-geid'
@@ -99,6 +103,71 @@ async def test_list_empty_dataset(
     assert res_json.get('result') == []
 
 
+async def test_list_all_datasets_should_stream_every_page(
+    test_async_client_auth,
+    httpx_mock: HTTPXMock,
+    mocker
+):
+    mocker.patch.object(ConfigClass, 'LISTING_PAGE_SIZE', 2)
+    mocker.patch.object(ConfigClass, 'LISTING_PREFETCH_PAGES', 2)
+    pages = [[{'code': 'dataset1'}, {'code': 'dataset2'}], [{'code': 'dataset3'}]]
+    for page, datasets in enumerate(pages):
+        httpx_mock.add_response(
+            method='POST',
+            url='http://dataset_service/v1/users/testuser/datasets',
+            match_content=json.dumps({
+                'page': page,
+                'page_size': 2,
+                'filter': {},
+                'order_type': 'desc',
+                'order_by': 'created_at'
+            }).encode(),
+            json={'code': 200, 'error_msg': '', 'result': datasets},
+            status_code=200,
+        )
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client_auth.get(
+        test_dataset_api, headers=header, query_string={'all': 'true'})
+    assert res.headers['content-type'].startswith('application/x-ndjson')
+    records = [json.loads(line) for line in res.text.splitlines()]
+    assert [record['code'] for record in records] == ['dataset1', 'dataset2', 'dataset3']
+
+
+async def test_list_all_datasets_with_failed_page_should_end_with_error_record(
+    test_async_client_auth,
+    httpx_mock: HTTPXMock,
+    mocker
+):
+    mocker.patch.object(ConfigClass, 'LISTING_PAGE_SIZE', 1)
+    mocker.patch.object(ConfigClass, 'LISTING_PREFETCH_PAGES', 1)
+    for page in range(3):
+        httpx_mock.add_response(
+            method='POST',
+            url='http://dataset_service/v1/users/testuser/datasets',
+            match_content=json.dumps({
+                'page': page,
+                'page_size': 1,
+                'filter': {},
+                'order_type': 'desc',
+                'order_by': 'created_at'
+            }).encode(),
+            json=(
+                {'code': 500, 'error_msg': 'dataset service error'}
+                if page == 2 else {'code': 200, 'error_msg': '', 'result': [{'code': f'dataset{page}'}]}
+            ),
+            status_code=500 if page == 2 else 200,
+        )
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client_auth.get(
+        test_dataset_api, headers=header, query_string={'all': 'true'})
+    records = [json.loads(line) for line in res.text.splitlines()]
+    assert records == [
+        {'code': 'dataset0'},
+        {'code': 'dataset1'},
+        {'status': 'error', 'error_msg': 'Cannot fetch page 2'},
+    ]
+
+
 async def test_get_dataset_detail_without_token(test_async_client):
     res = await test_async_client.get(test_dataset_detailed_api)
     res_json = res.json()
@@ -13,9 +13,13 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
+
 import pytest
 from pytest_httpx import HTTPXMock
 
+from app.config import ConfigClass
+
 pytestmark = pytest.mark.asyncio
 
 test_query_geid_api = '/v1/query/geid'
@@ -530,3 +534,212 @@ async def test_query_file_by_geid_when_file_is_archived(
     result = res_json.get('result')
     for entity in result:
         assert entity['result'] == {}
+
+
+async def test_query_file_by_geid_should_check_permission_once_per_project(
+    test_async_client_auth,
+    mocker,
+    httpx_mock
+):
+    geids = [f'file_geid_{i}' for i in range(6)]
+    payload = {'geid': geids}
+    header = {'Authorization': 'fake token'}
+    httpx_mock.add_response(
+        method='GET',
+        url='http://metadata_service/v1/items/batch/?' + '&'.join(f'ids={geid}' for geid in geids),
+        json={
+            'code': 200,
+            'error_msg': '',
+            'result': [
+                {
+                    'id': geid,
+                    'parent_path': 'testuser/folder',
+                    'archived': False,
+                    'type': 'file',
+                    'zone': 0,
+                    'name': geid,
+                    'container_code': 'project_a' if i % 2 else 'project_b',
+                    'container_type': 'project',
+                }
+                for i, geid in enumerate(geids)
+            ]
+        },
+        status_code=200
+    )
+    permission_mock = mocker.patch(
+        'app.routers.v1.api_file.has_permission',
+        side_effect=lambda identity, code, resource, zone, operation: code == 'project_a'
+    )
+    res = await test_async_client_auth.post(
+        test_query_geid_api,
+        headers=header,
+        json=payload)
+    assert res.status_code == 200
+    result = res.json().get('result')
+    assert [entity['geid'] for entity in result] == geids
+    assert permission_mock.call_count == 2
+    for i, entity in enumerate(result):
+        if i % 2:
+            assert entity['status'] == 'success'
+        else:
+            assert entity['status'] == 'Permission Denied'
+            assert entity['result'] == {}
+
+
+async def test_query_file_by_geid_should_split_geids_into_chunks(
+    test_async_client_auth,
+    mocker,
+    httpx_mock
+):
+    mocker.patch.object(ConfigClass, 'GEID_BATCH_CHUNK_SIZE', 2)
+    mocker.patch('app.routers.v1.api_file.has_permission', return_value=True)
+    payload = {'geid': ['geid_1', 'geid_2', 'geid_3', 'geid_1']}
+    header = {'Authorization': 'fake token'}
+    for url, geids in [
+        ('http://metadata_service/v1/items/batch/?ids=geid_1&ids=geid_2', ['geid_1', 'geid_2']),
+        ('http://metadata_service/v1/items/batch/?ids=geid_3', ['geid_3']),
+    ]:
+        httpx_mock.add_response(
+            method='GET',
+            url=url,
+            json={
+                'code': 200,
+                'result': [
+                    {
+                        'id': geid,
+                        'parent_path': 'testuser',
+                        'archived': False,
+                        'zone': 0,
+                        'container_code': project_code,
+                    }
+                    for geid in geids
+                ]
+            },
+            status_code=200
+        )
+    res = await test_async_client_auth.post(
+        test_query_geid_api,
+        headers=header,
+        json=payload)
+    assert res.status_code == 200
+    result = res.json().get('result')
+    assert [entity['geid'] for entity in result] == payload['geid']
+    assert all(entity['status'] == 'success' for entity in result)
+
+
+async def test_query_file_by_geid_with_too_many_geids_should_return_400(
+    test_async_client_auth,
+    mocker
+):
+    mocker.patch.object(ConfigClass, 'QUERY_GEID_MAX', 2)
+    payload = {'geid': ['geid_1', 'geid_2', 'geid_3']}
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client_auth.post(
+        test_query_geid_api,
+        headers=header,
+        json=payload)
+    assert res.status_code == 400
+
+
+async def test_query_file_by_geid_with_ndjson_accept_should_stream_records(
+    test_async_client_auth,
+    mocker,
+    httpx_mock
+):
+    mocker.patch.object(ConfigClass, 'GEID_BATCH_CHUNK_SIZE', 1)
+    mocker.patch('app.routers.v1.api_file.has_permission', return_value=True)
+    payload = {'geid': ['geid_1', 'geid_2']}
+    header = {'Authorization': 'fake token', 'Accept': 'application/x-ndjson'}
+    httpx_mock.add_response(
+        method='GET',
+        url='http://metadata_service/v1/items/batch/?ids=geid_1',
+        json={
+            'code': 200,
+            'result': [
+                {
+                    'id': 'geid_1',
+                    'parent_path': 'testuser',
+                    'archived': False,
+                    'zone': 0,
+                    'container_code': project_code,
+                }
+            ]
+        },
+        status_code=200
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url='http://metadata_service/v1/items/batch/?ids=geid_2',
+        json={'code': 200, 'result': []},
+        status_code=200
+    )
+    res = await test_async_client_auth.post(
+        test_query_geid_api,
+        headers=header,
+        json=payload)
+    assert res.status_code == 200
+    assert res.headers['content-type'] == 'application/x-ndjson'
+    records = [json.loads(line) for line in res.text.splitlines()]
+    assert [record['geid'] for record in records] == ['geid_1', 'geid_2']
+    assert records[0]['status'] == 'success'
+    assert records[1]['status'] == 'File Not Exist'
+
+
+async def test_query_file_by_geid_when_chunk_query_fails_should_return_500(
+    test_async_client_auth,
+    mocker,
+    httpx_mock
+):
+    mocker.patch.object(ConfigClass, 'GEID_BATCH_CHUNK_SIZE', 1)
+    mocker.patch('app.routers.v1.api_file.has_permission', return_value=True)
+    payload = {'geid': ['geid_1', 'geid_2']}
+    header = {'Authorization': 'fake token'}
+    httpx_mock.add_response(
+        method='GET',
+        url='http://metadata_service/v1/items/batch/?ids=geid_1',
+        json={'code': 200, 'result': []},
+        status_code=200
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url='http://metadata_service/v1/items/batch/?ids=geid_2',
+        json={'code': 500, 'error_msg': 'metadata down'},
+        status_code=500
+    )
+    res = await test_async_client_auth.post(
+        test_query_geid_api,
+        headers=header,
+        json=payload)
+    assert res.status_code == 500
+
+
+async def test_query_file_by_geid_stream_should_end_with_error_when_chunk_query_fails(
+    test_async_client_auth,
+    mocker,
+    httpx_mock
+):
+    mocker.patch.object(ConfigClass, 'GEID_BATCH_CHUNK_SIZE', 1)
+    mocker.patch('app.routers.v1.api_file.has_permission', return_value=True)
+    payload = {'geid': ['geid_1', 'geid_2']}
+    header = {'Authorization': 'fake token', 'Accept': 'application/x-ndjson'}
+    httpx_mock.add_response(
+        method='GET',
+        url='http://metadata_service/v1/items/batch/?ids=geid_1',
+        json={'code': 200, 'result': []},
+        status_code=200
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url='http://metadata_service/v1/items/batch/?ids=geid_2',
+        json={'code': 500, 'error_msg': 'metadata down'},
+        status_code=500
+    )
+    res = await test_async_client_auth.post(
+        test_query_geid_api,
+        headers=header,
+        json=payload)
+    assert res.status_code == 200
+    records = [json.loads(line) for line in res.text.splitlines()]
+    assert len(records) == 2
+    assert records[0]['status'] == 'File Not Exist'
+    assert records[1]['status'] == 'error'
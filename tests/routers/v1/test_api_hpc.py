@@ -15,6 +15,8 @@
 
 import pytest
 
+from app.config import ConfigClass
+
 pytestmark = pytest.mark.asyncio
 
 
@@ -383,3 +385,198 @@ async def test_hpc_get_partition_by_name_without_protocal_should_return_400(
     response = res.json()
     assert response.get('code') == 400
     assert response.get('error_msg') == 'HPC protocal required'
+
+
+async def test_hpc_partition_by_name_should_be_served_from_listed_partitions(
+    test_async_client,
+    httpx_mock
+):
+    params = {
+        'host': 'http://host',
+        'username': 'username',
+        'token': 'fake-hpc-token'
+    }
+    httpx_mock.add_response(
+        method='GET',
+        url=(
+            'http://service_hpc/v1/hpc/partitions?'
+            'slurm_host=host&username=username&protocol=http'),
+        json={
+            'result': [
+                {'partition_name1': {'nodes': ['fake_node']}},
+                {'partition_name2': {'nodes': ['fake_node2']}}],
+            'code': 200},
+        status_code=200,
+    )
+    header = {'Authorization': 'fake token'}
+    await test_async_client.get(
+        '/v1/hpc/partitions', headers=header, query_string=params)
+    res = await test_async_client.get(
+        '/v1/hpc/partitions/partition_name2',
+        headers=header,
+        query_string=params)
+    response = res.json()
+    assert response.get('code') == 200
+    assert response.get('result') == [
+        {'partition_name2': {'nodes': ['fake_node2']}}]
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_hpc_watch_job_should_stream_state_events(
+    test_async_client,
+    httpx_mock,
+    monkeypatch
+):
+    monkeypatch.setattr(ConfigClass, 'HPC_JOB_WATCH_INTERVAL', 0)
+    params = {
+        'host': 'http://host',
+        'username': 'username',
+        'token': 'fake-hpc-token'
+    }
+    for state in ['RUNNING', 'COMPLETED']:
+        httpx_mock.add_response(
+            method='GET',
+            url=(
+                'http://service_hpc/v1/hpc/job/12345?'
+                'slurm_host=host&username=username&protocol=http'),
+            json={'result': {'job_id': '12345', 'job_state': state},
+                  'code': 200},
+            status_code=200,
+        )
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client.get(
+        '/v1/hpc/job/12345/watch', headers=header, query_string=params)
+    assert res.headers['content-type'].startswith('text/event-stream')
+    assert res.text == (
+        'event: state\ndata: {"job_id": "12345", "job_state": "RUNNING"}\n\n'
+        'event: state\ndata: {"job_id": "12345", "job_state": "COMPLETED"}\n\n'
+    )
+
+
+async def test_hpc_watch_job_without_protocal_should_return_400(
+    test_async_client
+):
+    params = {
+        'host': 'http',
+        'username': 'username',
+        'token': 'fake-hpc-token'
+    }
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client.get(
+        '/v1/hpc/job/12345/watch', headers=header, query_string=params)
+    response = res.json()
+    assert response.get('code') == 400
+    assert response.get('error_msg') == 'HPC protocal required'
+
+
+async def test_hpc_get_jobs_status_should_return_info_by_job_id(
+    test_async_client,
+    httpx_mock
+):
+    payload = {
+        'host': 'http://host',
+        'username': 'username',
+        'token': 'fake-hpc-token',
+        'job_ids': ['12345', '123', '12345']
+    }
+    httpx_mock.add_response(
+        method='GET',
+        url=(
+            'http://service_hpc/v1/hpc/job/12345?'
+            'slurm_host=host&username=username&protocol=http'),
+        json={'result': {'job_id': '12345', 'job_state': 'COMPLETED'},
+              'code': 200},
+        status_code=200,
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url=(
+            'http://service_hpc/v1/hpc/job/123?'
+            'slurm_host=host&username=username&protocol=http'),
+        json={'error_msg': 'unknown job'},
+        status_code=200,
+    )
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client.post(
+        '/v1/hpc/jobs/status', headers=header, json=payload)
+    response = res.json()
+    assert response.get('code') == 200
+    assert response.get('result') == {
+        '12345': {'job_id': '12345', 'job_state': 'COMPLETED'},
+        '123': {'code': 404, 'error_msg': 'Job ID not found'},
+    }
+    assert len(httpx_mock.get_requests()) == 2
+
+
+async def test_hpc_get_jobs_status_with_too_many_ids_should_return_400(
+    test_async_client,
+    monkeypatch
+):
+    monkeypatch.setattr(ConfigClass, 'HPC_JOB_STATUS_MAX', 1)
+    payload = {
+        'host': 'http://host',
+        'username': 'username',
+        'token': 'fake-hpc-token',
+        'job_ids': ['1', '2']
+    }
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client.post(
+        '/v1/hpc/jobs/status', headers=header, json=payload)
+    response = res.json()
+    assert response.get('code') == 400
+    assert response.get('error_msg') == 'Too many job ids, at most 1 per request'
+
+
+async def test_submit_hpc_jobs_should_return_results_in_order(
+    test_async_client,
+    httpx_mock,
+    monkeypatch
+):
+    monkeypatch.setattr(ConfigClass, 'HPC_SUBMIT_CONCURRENCY_PER_HOST', 1)
+    payload = {
+        'host': 'http://host',
+        'username': 'username',
+        'token': 'fake-hpc-token',
+        'jobs': [{'script': 'sleep 1'}, {'script': 'sleep 2'}]
+    }
+    httpx_mock.add_response(
+        method='POST',
+        url='http://service_hpc/v1/hpc/job',
+        json={'result': {'job_id': 1}, 'code': 200},
+        status_code=200,
+    )
+    httpx_mock.add_response(
+        method='POST',
+        url='http://service_hpc/v1/hpc/job',
+        json={'error_msg': 'Zero Bytes were transmitted or received',
+              'code': 500},
+        status_code=200,
+    )
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client.post(
+        '/v1/hpc/jobs', headers=header, json=payload)
+    response = res.json()
+    assert response.get('code') == 200
+    assert response.get('result') == [
+        {'job_id': 1},
+        {'code': 403, 'error_msg': 'HPC token expired'},
+    ]
+
+
+async def test_submit_hpc_jobs_without_script_should_submit_nothing(
+    test_async_client,
+    httpx_mock
+):
+    payload = {
+        'host': 'http://host',
+        'username': 'username',
+        'token': 'fake-hpc-token',
+        'jobs': [{'script': 'sleep 1'}, {}, {'script': ''}]
+    }
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client.post(
+        '/v1/hpc/jobs', headers=header, json=payload)
+    response = res.json()
+    assert response.get('code') == 400
+    assert response.get('error_msg') == 'Missing script for jobs: 1, 2'
+    assert not httpx_mock.get_requests()
@@ -13,13 +13,29 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
+
+import httpx
 import pytest
 from pytest_httpx import HTTPXMock
 
+from app.config import ConfigClass
+
 pytestmark = pytest.mark.asyncio
 test_kg_api = '/v1/kg/resources'
 
 
+def kg_import_callback(request: httpx.Request):
+    data = json.loads(request.read())['data']
+    if 'kg_cli_failed.json' in data:
+        return httpx.Response(status_code=200, json={'code': 500, 'error_msg': 'kg failed', 'result': {}})
+    result = {
+        'processing': {name: {'@id': name} for name in data if name.startswith('new')},
+        'ignored': {name: {'@id': name} for name in data if not name.startswith('new')},
+    }
+    return httpx.Response(status_code=200, json={'code': 200, 'error_msg': '', 'result': result})
+
+
 async def test_kg_import_resource_should_return_200(
     test_async_client_kg_auth,
     httpx_mock: HTTPXMock
@@ -108,3 +124,119 @@ async def test_kg_import_existed_resource_should_return_200(
     assert res_json.get('code') == 200
     assert len(res_json.get('result').get('processing')) == 0
     assert len(res_json.get('result').get('ignored')) == 1
+
+
+async def test_kg_import_in_chunks_should_merge_results(
+    test_async_client_kg_auth,
+    httpx_mock: HTTPXMock,
+    monkeypatch
+):
+    monkeypatch.setattr(ConfigClass, 'KG_IMPORT_CHUNK_SIZE', 2)
+    httpx_mock.add_callback(kg_import_callback, method='POST', url='http://kg_service/v1/resources')
+    names = ['new1.json', 'old1.json', 'new2.json', 'old2.json', 'new3.json']
+    payload = {'data': {name: {'key_value_pairs': {}} for name in names}}
+    header = {
+        'schema': 'Bearer',
+        'credentials': 'fake_token'
+    }
+    res = await test_async_client_kg_auth.post(
+        test_kg_api, headers=header, json=payload)
+    res_json = res.json()
+    assert res_json.get('code') == 200
+    assert sorted(res_json['result']['processing']) == ['new1.json', 'new2.json', 'new3.json']
+    assert sorted(res_json['result']['ignored']) == ['old1.json', 'old2.json']
+    assert len(httpx_mock.get_requests()) == 3
+
+
+async def test_kg_import_with_failed_chunk_should_return_error_and_partial_result(
+    test_async_client_kg_auth,
+    httpx_mock: HTTPXMock,
+    monkeypatch
+):
+    monkeypatch.setattr(ConfigClass, 'KG_IMPORT_CHUNK_SIZE', 1)
+    httpx_mock.add_callback(kg_import_callback, method='POST', url='http://kg_service/v1/resources')
+    payload = {'data': {'new1.json': {}, 'kg_cli_failed.json': {}}}
+    header = {
+        'schema': 'Bearer',
+        'credentials': 'fake_token'
+    }
+    res = await test_async_client_kg_auth.post(
+        test_kg_api, headers=header, json=payload)
+    res_json = res.json()
+    assert res.status_code == 500
+    assert res_json.get('code') == 500
+    assert res_json.get('error_msg') == 'kg failed'
+    assert list(res_json['result']['processing']) == ['new1.json']
+
+
+async def test_kg_import_single_chunk_with_failed_import_should_return_error(
+    test_async_client_kg_auth,
+    httpx_mock: HTTPXMock
+):
+    httpx_mock.add_callback(kg_import_callback, method='POST', url='http://kg_service/v1/resources')
+    payload = {'data': {'kg_cli_failed.json': {}}}
+    header = {
+        'schema': 'Bearer',
+        'credentials': 'fake_token'
+    }
+    res = await test_async_client_kg_auth.post(
+        test_kg_api, headers=header, json=payload)
+    res_json = res.json()
+    assert res.status_code == 500
+    assert res_json.get('code') == 500
+    assert res_json.get('error_msg') == 'kg failed'
+
+
+async def test_kg_import_should_stream_chunk_results_as_ndjson(
+    test_async_client_kg_auth,
+    httpx_mock: HTTPXMock,
+    monkeypatch
+):
+    monkeypatch.setattr(ConfigClass, 'KG_IMPORT_CHUNK_SIZE', 1)
+    httpx_mock.add_callback(kg_import_callback, method='POST', url='http://kg_service/v1/resources')
+    payload = {'data': {'new1.json': {}, 'old1.json': {}}}
+    header = {
+        'schema': 'Bearer',
+        'credentials': 'fake_token',
+        'Accept': 'application/x-ndjson'
+    }
+    res = await test_async_client_kg_auth.post(
+        test_kg_api, headers=header, json=payload)
+    lines = sorted((json.loads(line) for line in res.text.splitlines()), key=lambda line: line['chunk'])
+    assert [(line['chunk'], line['total'], line['code']) for line in lines] == [(0, 2, 200), (1, 2, 200)]
+    assert lines[0]['result']['processing'] == {'new1.json': {'@id': 'new1.json'}}
+    assert lines[1]['result']['ignored'] == {'old1.json': {'@id': 'old1.json'}}
+
+
+async def test_kg_import_single_chunk_with_kg_service_error_should_return_500(
+    test_async_client_kg_auth,
+    httpx_mock: HTTPXMock
+):
+    httpx_mock.add_exception(httpx.ConnectError('kg down'), method='POST', url='http://kg_service/v1/resources')
+    payload = {'data': {'new1.json': {}}}
+    header = {
+        'schema': 'Bearer',
+        'credentials': 'fake_token'
+    }
+    res = await test_async_client_kg_auth.post(
+        test_kg_api, headers=header, json=payload)
+    assert res.status_code == 500
+    assert res.json().get('code') == 500
+
+
+async def test_kg_import_in_chunks_with_kg_service_error_should_return_500(
+    test_async_client_kg_auth,
+    httpx_mock: HTTPXMock,
+    monkeypatch
+):
+    monkeypatch.setattr(ConfigClass, 'KG_IMPORT_CHUNK_SIZE', 1)
+    httpx_mock.add_exception(httpx.ConnectError('kg down'), method='POST', url='http://kg_service/v1/resources')
+    payload = {'data': {'new1.json': {}, 'new2.json': {}}}
+    header = {
+        'schema': 'Bearer',
+        'credentials': 'fake_token'
+    }
+    res = await test_async_client_kg_auth.post(
+        test_kg_api, headers=header, json=payload)
+    assert res.status_code == 500
+    assert res.json().get('error_msg') == 'kg down; kg down'
@@ -13,12 +13,16 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
+import json
+
 import pytest
 
 pytestmark = pytest.mark.asyncio
 test_api = '/v1/manifest'
 test_export_api = '/v1/manifest/export'
 test_manifest_attach_api = '/v1/manifest/attach'
+test_manifest_attach_batch_api = '/v1/manifest/attach/batch'
 project_code = 'test_project'
 
 
@@ -562,6 +566,35 @@ async def test_attach_attributes_no_access_should_return_403(test_async_client_a
     assert error.lower() == 'Permission Denied'.lower()
 
 
+async def test_attach_attributes_no_access_with_file_query_error_should_return_403(test_async_client_auth, mocker):
+    payload = {
+        'manifest_name': 'fake manifest',
+        'project_code': project_code,
+        'attributes': {'fake_attribute': 'wrong name'},
+        'file_name': 'fake_file',
+        'zone': 'zone'
+    }
+    header = {'Authorization': 'fake token'}
+
+    async def denied(*args):
+        await asyncio.sleep(0.02)
+        return False
+
+    mocker.patch('app.routers.v1.api_manifest.has_permission', side_effect=denied)
+    mocker.patch(
+        'app.routers.v1.api_manifest.APIManifest._query_file_node', side_effect=KeyError('result')
+    )
+    mocker.patch('app.routers.v1.api_manifest.get_attribute_templates', return_value={'code': 200, 'result': []})
+    res = await test_async_client_auth.post(
+        test_manifest_attach_api,
+        headers=header,
+        json=payload
+    )
+    res_json = res.json()
+    assert res_json.get('code') == 403
+    assert res_json.get('error_msg') == 'Permission denied'
+
+
 async def test_fail_to_attach_attributes_return_404(test_async_client_auth, httpx_mock, mocker):
     payload = {
         'manifest_name': 'fake_manifest',
@@ -598,3 +631,95 @@ async def test_fail_to_attach_attributes_return_404(test_async_client_auth, http
     assert res_json.get('code') == 404
     error = res_json.get('error_msg')
     assert error == 'File Not Exist'
+
+
+def mock_batch_attach(httpx_mock):
+    httpx_mock.add_response(
+        method='GET',
+        url=f'http://metadata_service/v1/template/?project_code={project_code}&name=fake_manifest',
+        json={
+            'code': 200,
+            'error_msg': '',
+            'result': [
+                {
+                    'id': 'manifest-id',
+                    'name': 'fake_manifest',
+                    'project_code': project_code,
+                    'attributes': [
+                        {'name': 'attr1', 'optional': False, 'type': 'multiple_choice', 'options': ['a1', 'a2']},
+                    ]
+                }
+            ]
+        },
+        status_code=200,
+    )
+    for name, result in [('file_1', [{'id': 'file-1', 'type': 'file'}]), ('file_2', [])]:
+        httpx_mock.add_response(
+            method='GET',
+            url=(
+                f'http://metadata_service/v1/items/search/?container_code={project_code}'
+                '&container_type=project'
+                '&parent_path=folder'
+                '&recursive=false'
+                '&zone=0'
+                '&archived=false'
+                f'&name={name}'
+            ),
+            json={'code': 200, 'error_msg': '', 'result': result},
+            status_code=200,
+        )
+    httpx_mock.add_response(
+        method='PUT',
+        url='http://metadata_service/v1/item/?id=file-1',
+        json={'code': 200, 'error_msg': '', 'result': {'id': 'file-1'}},
+        status_code=200,
+    )
+    return {
+        'manifest_name': 'fake_manifest',
+        'project_code': project_code,
+        'zone': 'gr',
+        'items': [
+            {'file_name': 'folder/file_1', 'attributes': {'attr1': 'a1'}},
+            {'file_name': 'folder/file_2', 'attributes': {'attr1': 'a2'}},
+            {'file_name': 'folder/file_3', 'attributes': {'attr1': 'a3'}},
+        ]
+    }
+
+
+async def test_attach_manifest_batch_should_return_result_per_file(test_async_client_auth, mocker, httpx_mock):
+    permission = mocker.patch('app.routers.v1.api_manifest.has_permission', return_value=True)
+    payload = mock_batch_attach(httpx_mock)
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client_auth.post(test_manifest_attach_batch_api, headers=header, json=payload)
+    res_json = res.json()
+    assert res_json.get('code') == 200
+    assert [item['code'] for item in res_json['result']] == [200, 404, 400]
+    assert res_json['result'][0]['result'] == {'id': 'file-1'}
+    assert res_json['result'][2]['error_msg'] == 'Invalid Choice Field attr1'
+    assert permission.call_count == 1
+
+
+async def test_attach_manifest_batch_should_stream_ndjson(test_async_client_auth, mocker, httpx_mock):
+    mocker.patch('app.routers.v1.api_manifest.has_permission', return_value=True)
+    payload = mock_batch_attach(httpx_mock)
+    header = {'Authorization': 'fake token', 'Accept': 'application/x-ndjson'}
+    res = await test_async_client_auth.post(test_manifest_attach_batch_api, headers=header, json=payload)
+    assert res.headers['content-type'].startswith('application/x-ndjson')
+    records = [json.loads(line) for line in res.text.splitlines()]
+    assert records[0]['file_name'] == 'folder/file_3'
+    assert {record['file_name']: record['code'] for record in records} == {
+        'folder/file_1': 200, 'folder/file_2': 404, 'folder/file_3': 400
+    }
+
+
+async def test_attach_manifest_batch_without_permission_should_return_403(test_async_client_auth, mocker):
+    mocker.patch('app.routers.v1.api_manifest.has_permission', return_value=False)
+    payload = {
+        'manifest_name': 'fake_manifest',
+        'project_code': project_code,
+        'zone': 'gr',
+        'items': [{'file_name': 'folder/file_1', 'attributes': {'attr1': 'a1'}}],
+    }
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client_auth.post(test_manifest_attach_batch_api, headers=header, json=payload)
+    assert res.json().get('code') == 403
@@ -13,10 +13,14 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import json
+
 import pytest
 from pytest_httpx import HTTPXMock
 from requests.models import Response
 
+from app.config import ConfigClass
+
 pytestmark = pytest.mark.asyncio
 test_project_api = '/v1/projects'
 test_get_project_file_api = '/v1/project/test_project/files'
@@ -40,6 +44,27 @@ async def test_get_project_list_should_return_200(
     assert len(projects) == len(test_project)
 
 
+async def test_get_all_projects_should_stream_every_page(
+    test_async_client_auth, mocker
+):
+    mocker.patch.object(ConfigClass, 'LISTING_PAGE_SIZE', 2)
+    pages = {0: ['project1', 'project2'], 1: ['project3', 'project4'], 2: ['project5']}
+    get_projects = mocker.patch(
+        'app.routers.v1.api_project.get_user_projects',
+        side_effect=lambda identity, page, *args: [{'code': code} for code in pages.get(page, [])],
+    )
+    header = {'Authorization': 'fake token'}
+    res = await test_async_client_auth.get(
+        test_project_api, headers=header, query_string={'all': 'true'}
+    )
+    assert res.headers['content-type'].startswith('application/x-ndjson')
+    records = [json.loads(line) for line in res.text.splitlines()]
+    assert [record['code'] for record in records] == [
+        'project1', 'project2', 'project3', 'project4', 'project5'
+    ]
+    assert [call.args[1] for call in get_projects.call_args_list][:3] == [0, 1, 2]
+
+
 async def test_get_project_list_without_token_should_return_401(
     test_async_client,
 ):
@@ -269,6 +294,109 @@ async def test_upload_with_conflict_should_return_409(
     assert res_json.get('error_msg') == 'File with that name already exists'
 
 
+async def test_upload_files_in_same_folder_checks_names_in_one_query(
+    test_async_client_auth, mocker, httpx_mock
+):
+    payload = {
+        'operator': 'test_user',
+        'upload_message': 'test',
+        'type': 'processed',
+        'zone': 'zone',
+        'filename': 'fake.png',
+        'job_type': 'AS_FILE',
+        'current_folder_node': '',
+        'data': [
+            {'resumable_filename': 'a.png', 'resumable_relative_path': 'folder'},
+            {'resumable_filename': 'b.png', 'resumable_relative_path': 'folder'},
+        ],
+    }
+    mocker.patch.object(ConfigClass, 'METADATA_MULTI_NAME_QUERY', True)
+    mocker.patch(
+        'app.routers.v1.api_project.validate_upload_event',
+        return_value=(None, None),
+    )
+    httpx_mock.add_response(
+        method='GET',
+        url=(
+            'http://metadata_service/v1/items/search/'
+            '?container_code=test_project'
+            '&container_type=project'
+            '&parent_path=folder'
+            '&recursive=false'
+            '&zone=0'
+            '&archived=false'
+            '&type=file'
+            '&name=a.png'
+            '&name=b.png'
+        ),
+        json={
+            'code': 200,
+            'error_msg': '',
+            'result': [{'id': 'fake-geid', 'name': 'b.png', 'type': 'file'}],
+        },
+        status_code=200,
+    )
+    header = {'Authorization': 'fake token'}
+    response = await test_async_client_auth.post(
+        test_get_project_file_api, headers=header, json=payload
+    )
+    res_json = response.json()
+    assert res_json.get('code') == 409
+    assert res_json.get('error_msg') == 'File with that name already exists'
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_upload_files_checks_each_file_when_no_conflict(
+    test_async_client_auth, mocker, httpx_mock
+):
+    payload = {
+        'operator': 'test_user',
+        'upload_message': 'test',
+        'type': 'processed',
+        'zone': 'zone',
+        'filename': 'fake.png',
+        'job_type': 'AS_FILE',
+        'current_folder_node': '',
+        'data': [
+            {'resumable_filename': 'a.png', 'resumable_relative_path': ''},
+            {'resumable_filename': 'b.png', 'resumable_relative_path': ''},
+        ],
+    }
+    mocker.patch(
+        'app.routers.v1.api_project.validate_upload_event',
+        return_value=(None, None),
+    )
+    for name in ['a.png', 'b.png']:
+        httpx_mock.add_response(
+            method='GET',
+            url=(
+                'http://metadata_service/v1/items/search/'
+                '?container_code=test_project'
+                '&container_type=project'
+                '&parent_path='
+                '&recursive=false'
+                '&zone=0'
+                '&archived=false'
+                '&type=file'
+                f'&name={name}'
+            ),
+            json={'code': 200, 'error_msg': '', 'result': []},
+            status_code=200,
+        )
+    mock_response = Response()
+    mock_response.status_code = 200
+    mock_response._content = b'{ "result" : [] }'
+    mocker.patch(
+        'app.routers.v1.api_project.transfer_to_pre', return_value=mock_response
+    )
+    header = {'Authorization': 'fake token'}
+    response = await test_async_client_auth.post(
+        test_get_project_file_api, headers=header, json=payload
+    )
+    assert response.status_code == 200
+    assert len(httpx_mock.get_requests()) == 2
+
+
 async def test_upload_with_internal_error_should_return_500(
     test_async_client_auth, mocker, httpx_mock
 ):
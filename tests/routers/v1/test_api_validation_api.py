@@ -19,6 +19,7 @@ from app.models.error_model import InvalidEncryptionError
 
 pytestmark = pytest.mark.asyncio
 test_validate_manifest_api = '/v1/validate/manifest'
+test_validate_manifests_api = '/v1/validate/manifests'
 test_validate_env_api = '/v1/validate/env'
 
 
@@ -242,6 +243,102 @@ async def test_invalidate_env_with_encrypted_message_should_return_403(
     assert response.get('code') == 403
 
 
+async def test_validate_manifests_should_fetch_template_once_per_group(test_async_client_auth, mocker, httpx_mock):
+    permission = mocker.patch('app.routers.v1.api_validation.has_permission', return_value=True)
+    httpx_mock.add_response(
+        method='GET',
+        url='http://metadata_service/v1/template/?project_code=test_project&name=fake_manifest',
+        json={
+            'code': 200,
+            'error_msg': '',
+            'result': [
+                {
+                    'id': 'fake-id',
+                    'name': 'fake_manifest',
+                    'project_code': 'test_project',
+                    'attributes': [
+                        {'name': 'attr1', 'optional': False, 'type': 'multiple_choice', 'options': ['a1', 'a2']},
+                    ]
+                }
+            ]
+        },
+        status_code=200,
+    )
+    payload = {
+        'manifests': [
+            {'manifest_name': 'fake_manifest', 'project_code': 'test_project', 'attributes': {'attr1': 'a1'}},
+            {'manifest_name': 'fake_manifest', 'project_code': 'test_project', 'attributes': {'attr1': 'a3'}},
+            {'manifest_name': 'fake_manifest', 'attributes': {'attr1': 'a1'}},
+            {'manifest_name': 'fake_manifest', 'project_code': 'test_project', 'attributes': {'attr1': 'a2'}},
+        ]
+    }
+    res = await test_async_client_auth.post(test_validate_manifests_api, json=payload)
+    res_json = res.json()
+    assert res_json.get('code') == 200
+    assert [item['code'] for item in res_json['result']] == [200, 400, 400, 200]
+    assert res_json['result'][1]['error_msg'] == 'Invalid Choice Field attr1'
+    assert permission.call_count == 1
+    assert len(httpx_mock.get_requests()) == 1
+
+
+async def test_validate_manifests_without_permission_should_mark_group_403(test_async_client_auth, mocker):
+    mocker.patch('app.routers.v1.api_validation.has_permission', return_value=False)
+    payload = {
+        'manifests': [
+            {'manifest_name': 'fake_manifest', 'project_code': 'test_project', 'attributes': {'attr1': 'a1'}},
+        ]
+    }
+    res = await test_async_client_auth.post(test_validate_manifests_api, json=payload)
+    res_json = res.json()
+    assert res_json['result'][0]['code'] == 403
+    assert res_json['result'][0]['result'] == 'invalid'
+
+
+async def test_validate_manifests_with_failed_group_should_only_mark_that_group(
+    test_async_client_auth,
+    mocker,
+    httpx_mock
+):
+    async def has_permission(current_identity, project_code, *args):
+        if project_code == 'down_project':
+            raise Exception('auth service down')
+        return True
+
+    mocker.patch('app.routers.v1.api_validation.has_permission', side_effect=has_permission)
+    httpx_mock.add_response(
+        method='GET',
+        url='http://metadata_service/v1/template/?project_code=test_project&name=fake_manifest',
+        json={
+            'code': 200,
+            'error_msg': '',
+            'result': [
+                {
+                    'id': 'fake-id',
+                    'name': 'fake_manifest',
+                    'project_code': 'test_project',
+                    'attributes': [
+                        {'name': 'attr1', 'optional': False, 'type': 'multiple_choice', 'options': ['a1', 'a2']},
+                    ]
+                }
+            ]
+        },
+        status_code=200,
+    )
+    payload = {
+        'manifests': [
+            {'manifest_name': 'fake_manifest', 'project_code': 'down_project', 'attributes': {'attr1': 'a1'}},
+            {'manifest_name': 'fake_manifest', 'project_code': 'test_project', 'attributes': {'attr1': 'a1'}},
+            {'manifest_name': 'fake_manifest', 'project_code': 'test_project', 'attributes': ['a1']},
+        ]
+    }
+    res = await test_async_client_auth.post(test_validate_manifests_api, json=payload)
+    res_json = res.json()
+    assert res.status_code == 200
+    assert [item['code'] for item in res_json['result']] == [500, 200, 400]
+    assert res_json['result'][0]['error_msg'] == 'auth service down'
+    assert res_json['result'][2]['error_msg'] == 'attributes must be an object'
+
+
 async def test_validate_env_with_wrong_zone_should_return_400(test_async_client_auth, mocker):
     mocker.patch('app.routers.v1.api_validation.has_permission', return_value=True)
     payload = {'action': 'test_action', 'environ': '', 'zone': 'zone'}